@@ -17,9 +17,47 @@ class Config(object):
     P1_DEPTH = 2
     #: int: Determines the depth to use for player 2 if it is an AI.
     P2_DEPTH = 2
-    #: str: Determines the algorithm to use for player 1 if it is an AI.
+    #: float: The time budget per move for player 1 if it is an AI, in seconds. When set, the AI deepens iteratively up to P1_DEPTH.
+    P1_TIME = None
+    #: float: The time budget per move for player 2 if it is an AI, in seconds. When set, the AI deepens iteratively up to P2_DEPTH.
+    P2_TIME = None
+    #: int: The node budget per move for both AIs. When set, the AIs deepen iteratively up to their depth.
+    NODE_LIMIT = None
+    #: str: Determines the algorithm to use for player 1 if it is an AI, "MiniMax", "AlphaBeta", "PVS" or "MTDf".
     P1_ALG = "MiniMax"
-    #: int: Determines the algorithm to use for player 2 if it is an AI.
+    #: str: Determines the algorithm to use for player 2 if it is an AI, "MiniMax", "AlphaBeta", "PVS" or "MTDf".
     P2_ALG = "AlphaBeta"
+    #: bool: Orders the AlphaBeta search's moves with the transposition table, capture size, killer moves and a history table.
+    MOVE_ORDERING = True
+    #: float: The half-width of the aspiration window around the expected utility value of AlphaBeta and PVS root searches. 0 searches the full window.
+    ASPIRATION_WINDOW = 0.05
+    #: int: How many jumps past the search horizon a capture exchange is followed before evaluating. 0 turns quiescence search off.
+    QUIESCENCE_DEPTH = 8
+    #: bool: Searches the late quiet moves of the AlphaBeta search one move shallower, unless they turn out better.
+    LATE_MOVE_REDUCTION = False
+    #: int: The number of moves searched at full depth before late move reductions start.
+    LMR_MOVES = 3
+    #: int: The smallest remaining depth at which late move reductions apply.
+    LMR_DEPTH = 3
+    #: bool: Skips quiet moves next to the AlphaBeta search horizon that cannot raise the utility value to alpha (beta).
+    FUTILITY_PRUNING = False
+    #: float: The most a quiet move is expected to change the utility value, for futility pruning.
+    FUTILITY_MARGIN = 0.05
+    #: int: The number of processes searching the root moves in parallel. 1 searches serially.
+    WORKERS = 1
+    #: str: How the worker processes search, "root" to split the root moves between them, "smp" for Lazy SMP or "ybw" for Young Brothers Wait.
+    PARALLEL = "root"
+    #: int: The smallest number of moves left below a node for its young brothers to be searched in parallel, with PARALLEL = "ybw".
+    YBW_DEPTH = 4
+    #: bool: Whether the AI searches the human's replies while the human thinks, in Human vs. AI games.
+    PONDER = False
+    #: str: The endgame tablebase file the AIs probe once few pieces are left, built by :mod:`endgame_tablebase`. None turns the tablebase off.
+    TABLEBASE = None
+    #: float: The memory budget of each AI's transposition table, in megabytes.
+    TT_MB = 8
+    #: str: The transposition table replacement policy, "depth" (depth-preferred) or "always" (always-replace).
+    TT_REPLACEMENT = "depth"
     #: bool: Flag for printing the metrics for the AI at the end of the game.
-    PRINT_METRICS = True
\ No newline at end of file
+    PRINT_METRICS = True
+    #: bool: Plays the game on the bitboard engine (:mod:`bitboard_state`) instead of :class:`.checkers_state.Board`.
+    BITBOARD = False
\ No newline at end of file
@@ -0,0 +1,274 @@
+"""Benchmarks for the search engine.
+
+Example:
+    You can run the benchmarks by using::
+
+        $ python benchmarks.py
+
+"""
+
+import search_engine
+import checkers_state
+import ai_config
+import contextlib
+import io
+import random
+import time
+
+@contextlib.contextmanager
+def config_settings(**settings):
+    """
+    Changes :class:`.Config` values for the duration of a with block.
+
+    Args:
+        **settings: The Config attributes to set, by name.
+    """
+    previous = {name: getattr(ai_config.Config, name) for name in settings}
+    try:
+        for (name, value) in settings.items():
+            setattr(ai_config.Config, name, value)
+        yield
+    finally:
+        for (name, value) in previous.items():
+            setattr(ai_config.Config, name, value)
+
+def benchmark_positions(num_positions=8, plies=10, seed=2016):
+    """
+    Builds a fixed set of positions, by playing seeded random games from the initial board.
+
+    Args:
+        num_positions (Optional[int]): The number of positions.
+        plies (Optional[int]): The number of random moves played to reach each position.
+        seed (Optional[int]): The random seed. The same seed always gives the same positions.
+
+    Returns:
+        List[CheckersState]: The positions. Games that end early give their last non-final position.
+    """
+    rand = random.Random(seed)
+    positions = []
+    for _ in range(num_positions):
+        controller1 = search_engine.AIController()
+        controller2 = search_engine.AIController()
+        state = checkers_state.CheckersState(board=checkers_state.Board(controller1, controller2))
+        for _ in range(plies):
+            moves = state.get_moves()
+            successor = state.get_successor(rand.choice(moves))
+            if successor.is_end_state():
+                break
+            state = successor
+        positions.append(state)
+    return positions
+
+def count_nodes(positions, depth=6, mode="AlphaBeta"):
+    """
+    Searches each position with a fresh engine and transposition table.
+
+    Args:
+        positions (List[TwoPlayerGameState]): The positions to search.
+        depth (Optional[int]): The depth to search to.
+        mode (Optional[str]): The algorithm to use.
+
+    Returns:
+        (int, float): The total number of explored nodes, and the total time in seconds.
+    """
+    nodes = 0
+    elapsed = 0
+    for state in positions:
+        engine = search_engine.SearchEngine(state, mode, depth)
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.getNextState()
+        nodes += engine.get_num_explored()
+        elapsed += engine.get_time_elapsed()
+    return (nodes, elapsed)
+
+def compare_move_ordering(positions, depth=6):
+    """
+    Counts the nodes explored on the positions with and without :attr:`.Config.MOVE_ORDERING`.
+
+    Args:
+        positions (List[TwoPlayerGameState]): The positions to search.
+        depth (Optional[int]): The depth to search to.
+
+    Returns:
+        ((int, float), (int, float)): The node count and time without, then with move ordering.
+    """
+    with config_settings(MOVE_ORDERING=False):
+        unordered = count_nodes(positions, depth)
+    with config_settings(MOVE_ORDERING=True):
+        ordered = count_nodes(positions, depth)
+    return (unordered, ordered)
+
+def compare_algorithms(positions, depth=6, before="AlphaBeta", after="PVS"):
+    """
+    Counts the nodes explored on the positions by two algorithms.
+
+    Args:
+        positions (List[TwoPlayerGameState]): The positions to search.
+        depth (Optional[int]): The depth to search to.
+        before (Optional[str]): The algorithm to compare against.
+        after (Optional[str]): The algorithm to compare.
+
+    Returns:
+        ((int, float), (int, float)): The node count and time of each algorithm.
+    """
+    return (count_nodes(positions, depth, before), count_nodes(positions, depth, after))
+
+def compare_selective(positions, depth=8, mode="PVS"):
+    """
+    Counts the nodes explored on the positions with and without the selective search options,
+    :attr:`.Config.LATE_MOVE_REDUCTION` and :attr:`.Config.FUTILITY_PRUNING`.
+
+    Args:
+        positions (List[TwoPlayerGameState]): The positions to search.
+        depth (Optional[int]): The depth to search to.
+        mode (Optional[str]): The algorithm to use.
+
+    Returns:
+        ((int, float), (int, float), int): The node count and time without, then with selective search,
+        and the number of positions where the utility value found changed.
+    """
+    results = []
+    for selective in (False, True):
+        with config_settings(LATE_MOVE_REDUCTION=selective, FUTILITY_PRUNING=selective):
+            (nodes, elapsed) = (0, 0)
+            values = []
+            for state in positions:
+                engine = search_engine.SearchEngine(state, mode, depth)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    engine.getNextState()
+                nodes += engine.get_num_explored()
+                elapsed += engine.get_time_elapsed()
+                values.append(engine.get_utility())
+            results.append(((nodes, elapsed), values))
+    changed = sum(1 for (full, selective) in zip(results[0][1], results[1][1]) if abs(full - selective) > 1e-9)
+    return (results[0][0], results[1][0], changed)
+
+def compare_parallel(positions, depth=8, workers=4, mode="AlphaBeta", parallel="root"):
+    """
+    Times the serial and a parallel search on the positions, and checks they choose the same moves.
+
+    Args:
+        positions (List[TwoPlayerGameState]): The positions to search.
+        depth (Optional[int]): The depth to search to.
+        workers (Optional[int]): The number of worker processes.
+        mode (Optional[str]): The algorithm to use.
+        parallel (Optional[str]): The parallel search to use, see :class:`.SearchEngine`.
+
+    Returns:
+        ((int, float), (int, float), int): The node count and time of the serial, then the parallel search,
+        and the number of positions where they chose different moves.
+    """
+    results = []
+    for count in (1, workers):
+        (nodes, elapsed) = (0, 0)
+        actions = []
+        for state in positions:
+            engine = search_engine.SearchEngine(state, mode, depth, workers=count, parallel=parallel)
+            with contextlib.redirect_stdout(io.StringIO()):
+                actions.append(engine.getNextState().get_action())
+            nodes += engine.get_num_explored()
+            elapsed += engine.get_time_elapsed()
+        results.append(((nodes, elapsed), actions))
+    different = sum(1 for (serial, parallel) in zip(results[0][1], results[1][1]) if serial != parallel)
+    return (results[0][0], results[1][0], different)
+
+def time_to_depth(positions, depth=9, workers=(1, 2, 4), mode="AlphaBeta"):
+    """
+    Times the Lazy SMP search to a fixed depth on the positions, for each number of workers.
+
+    Args:
+        positions (List[TwoPlayerGameState]): The positions to search.
+        depth (Optional[int]): The depth to search to.
+        workers (Optional[Iterable[int]]): The numbers of worker processes to time.
+        mode (Optional[str]): The algorithm to use.
+
+    Returns:
+        List[(int, float)]: The number of workers, and the total time to reach the depth.
+    """
+    times = []
+    for count in workers:
+        elapsed = 0
+        for state in positions:
+            engine = search_engine.SearchEngine(state, mode, depth, workers=count, parallel="smp")
+            with contextlib.redirect_stdout(io.StringIO()):
+                engine.getNextState()
+            elapsed += engine.get_time_elapsed()
+        times.append((count, elapsed))
+    return times
+
+def evaluation_rate(positions, evaluations=100000):
+    """
+    Times leaf evaluation: calls :meth:`TwoPlayerGameState.get_utility_value` on the positions in turn.
+    
+    Args:
+        positions (List[TwoPlayerGameState]): The positions to evaluate.
+        evaluations (Optional[int]): The total number of evaluations.
+        
+    Returns:
+        float: The number of evaluations per second.
+    """
+    rounds = max(evaluations // len(positions), 1)
+    start = time.time()
+    for state in positions:
+        evaluate = state.get_utility_value
+        for _ in range(rounds):
+            evaluate()
+    return rounds * len(positions) / (time.time() - start)
+
+def horizon_swing(positions, depth=4):
+    """
+    Measures the horizon effect: how much the utility value found for each position changes
+    from one depth to the next, with and without quiescence search.
+
+    Args:
+        positions (List[TwoPlayerGameState]): The positions to search.
+        depth (Optional[int]): The shallower of the two depths compared.
+
+    Returns:
+        (float, float): The average change of the utility value without, then with quiescence search.
+    """
+    swings = []
+    for setting in (0, ai_config.Config.QUIESCENCE_DEPTH or 8):
+        with config_settings(QUIESCENCE_DEPTH=setting):
+            swing = 0
+            for state in positions:
+                values = []
+                for search_depth in (depth, depth+1):
+                    engine = search_engine.SearchEngine(state, "AlphaBeta", search_depth)
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        engine.getNextState()
+                    values.append(engine.get_utility())
+                swing += abs(values[1] - values[0])
+            swings.append(swing / len(positions))
+    return tuple(swings)
+
+def print_result(name, before, after):
+    """Prints a before/after comparison of node counts and times."""
+    print(name)
+    print("    Before: ".ljust(12)+"{0} nodes, {1:.3f} seconds".format(*before))
+    print("    After: ".ljust(12)+"{0} nodes, {1:.3f} seconds".format(*after))
+    print("    Nodes: ".ljust(12)+"{0:.1%}".format(after[0] / before[0]))
+
+if __name__ == "__main__":
+    start = time.time()
+    positions = benchmark_positions()
+    print_result("Move ordering (depth 8):", *compare_move_ordering(positions, 8))
+    print_result("PVS against AlphaBeta (depth 8):", *compare_algorithms(positions, 8))
+    print_result("MTDf against PVS (depth 8):", *compare_algorithms(positions, 8, "PVS", "MTDf"))
+    (full, selective, changed) = compare_selective(positions, 8)
+    print_result("Selective search (PVS, depth 8):", full, selective)
+    print("    Changed: ".ljust(12)+str(changed)+" of "+str(len(positions))+" values")
+    (serial, parallel, different) = compare_parallel(positions, 8, 4)
+    print_result("Root-parallel search, 4 workers (AlphaBeta, depth 8):", serial, parallel)
+    print("    Time: ".ljust(12)+"{0:.1%}".format(parallel[1] / serial[1]))
+    print("    Changed: ".ljust(12)+str(different)+" of "+str(len(positions))+" moves")
+    for depth in (8, 10):
+        (serial, parallel, different) = compare_parallel(positions, depth, 4, parallel="ybw")
+        print_result("Young Brothers Wait, 4 workers (AlphaBeta, depth "+str(depth)+"):", serial, parallel)
+        print("    Time: ".ljust(12)+"{0:.1%}".format(parallel[1] / serial[1]))
+    print("Lazy SMP time to depth 9 (AlphaBeta):")
+    for (count, elapsed) in time_to_depth(positions, 9, (1, 2, 4)):
+        print("    "+str(count)+" workers: ".ljust(12)+"{0:.3f} seconds".format(elapsed))
+    print("Evaluations per second: "+"{0:.0f}".format(evaluation_rate(positions)))
+    print("Horizon swing, depth 4 to 5 (without, with quiescence): "+"{0:.4f}, {1:.4f}".format(*horizon_swing(positions, 4)))
+    print("Total Time: "+"{0:.3f} seconds".format(time.time()-start))
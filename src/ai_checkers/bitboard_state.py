@@ -0,0 +1,739 @@
+"""The module containing the bitboard Checkers engine.
+
+The position is stored as three 32-bit masks over the playable squares:
+player 1's pieces, player 2's pieces and kings. Square ``s`` lies on row
+``s >> 2`` and column ``2*(s & 3) + ((s >> 2) & 1)``, so the bit order matches
+the scan order of :class:`checkers_state.Board` and moves come out in the same
+order as :meth:`checkers_state.CheckersState.get_successors`.
+"""
+
+import search_engine
+import ai_config
+
+FULL = 0xFFFFFFFF #: int: Mask of all 32 playable squares.
+EVEN_ROWS = 0x0F0F0F0F #: int: Mask of the squares on rows 1, 3, 5 and 7.
+ODD_ROWS = 0xF0F0F0F0 #: int: Mask of the squares on rows 2, 4, 6 and 8.
+NOT_LEFT = 0x0E0E0E0E #: int: Even-row squares that are not on the A file.
+NOT_RIGHT = 0x70707070 #: int: Odd-row squares that are not on the H file.
+
+PLAYER1_START = 0x00000FFF #: int: Player 1's pieces at the start of the game.
+PLAYER2_START = 0xFFF00000 #: int: Player 2's pieces at the start of the game.
+PLAYER1_CROWN = 0xF0000000 #: int: The row where player 1's pieces are crowned.
+PLAYER2_CROWN = 0x0000000F #: int: The row where player 2's pieces are crowned.
+
+DOWN_LEFT = 0 #: int: The (-1, -1) direction.
+UP_LEFT = 1 #: int: The (-1, +1) direction.
+DOWN_RIGHT = 2 #: int: The (+1, -1) direction.
+UP_RIGHT = 3 #: int: The (+1, +1) direction.
+
+KING_DIRECTIONS = (DOWN_LEFT, UP_LEFT, DOWN_RIGHT, UP_RIGHT) #: tuple: Directions a king moves in, in :meth:`checkers_state.Piece.get_moves` order.
+UP_DIRECTIONS = (UP_LEFT, UP_RIGHT) #: tuple: Directions player 1's pieces move in.
+DOWN_DIRECTIONS = (DOWN_LEFT, DOWN_RIGHT) #: tuple: Directions player 2's pieces move in.
+
+def step(mask, direction):
+    """
+    Shifts every square of the mask one diagonal step in the given direction.
+    Squares that would leave the board are dropped.
+
+    Args:
+        mask (int): The squares to shift.
+        direction (int): One of :data:`DOWN_LEFT`, :data:`UP_LEFT`, :data:`DOWN_RIGHT` or :data:`UP_RIGHT`.
+
+    Returns:
+        int: The shifted squares.
+    """
+    if direction == UP_LEFT:
+        return (((mask & NOT_LEFT) << 3) | ((mask & ODD_ROWS) << 4)) & FULL
+    elif direction == UP_RIGHT:
+        return (((mask & EVEN_ROWS) << 4) | ((mask & NOT_RIGHT) << 5)) & FULL
+    elif direction == DOWN_LEFT:
+        return ((mask & NOT_LEFT) >> 5) | ((mask & ODD_ROWS) >> 4)
+    else:
+        return ((mask & EVEN_ROWS) >> 4) | ((mask & NOT_RIGHT) >> 3)
+
+def square_to_coord(square):
+    """
+    Converts a square index to board coordinates.
+
+    Args:
+        square (int): The square index (0-31).
+
+    Returns:
+        (int, int): The (x, y) coordinate of the square.
+    """
+    y = square >> 2
+    return (2*(square & 3) + (y & 1), y)
+
+def coord_to_square(x, y):
+    """
+    Converts board coordinates to a square index.
+
+    Args:
+        x (int): The x coordinate.
+        y (int): The y coordinate.
+
+    Returns:
+        int: The square index, or None if (x, y) is not a playable square.
+    """
+    if (x+y)%2 != 0:
+        return None
+    return y*4 + x//2
+
+def square_name(square):
+    """
+    Gives the notation of a square, e.g. 'A1'.
+
+    Args:
+        square (int): The square index (0-31).
+
+    Returns:
+        str: The square's name.
+    """
+    (x, y) = square_to_coord(square)
+    return chr(ord('A')+x)+str(y+1)
+
+def squares(mask):
+    """
+    Lists the squares of a mask in ascending order.
+
+    Args:
+        mask (int): The mask to read.
+
+    Returns:
+        List[int]: The square indices set in the mask.
+    """
+    result = []
+    while mask:
+        low = mask & -mask
+        result.append(low.bit_length() - 1)
+        mask ^= low
+    return result
+
+def count(mask):
+    """
+    Counts the squares set in a mask.
+
+    Args:
+        mask (int): The mask to count.
+
+    Returns:
+        int: The number of set squares.
+    """
+    return bin(mask).count("1")
+
+class BitboardState(search_engine.TwoPlayerGameState):
+    """A state class. Used to define a Checkers game state on a :class:`BitBoard`.
+
+    Args:
+        action (Optional[str]): The action that led to the state.
+        parent (Optional[BitboardState]): The predecessor state.
+        controller1 (Optional[Controller]): The controller for the player that will start first (MAX).
+        controller2 (Optional[Controller]): The controller for the player that will start second (MIN).
+        board (Optional[BitBoard]): The board to copy the position from.
+        move (Optional[BitMove]): The move that led to the state, formatted as its action when the action is None.
+
+    .. note:: The state must be provided either a parent state, or controller 1 and controller 2.
+
+    """
+    def __init__(self,action="START",parent=None,controller1=None,controller2=None,board=None,move=None):
+
+        self.__successors = None
+        self.__moves = None
+        self.__move = move
+
+        super().__init__(action = action, parent = parent,
+                         controller1 = controller1, controller2 = controller2)
+
+        if board:
+            self.__board = BitBoard(board=board)
+        elif parent:
+            self.__board = BitBoard(board=parent.get_board())
+        else:
+            controller1.set_is_max(True)
+            controller2.set_is_max(False)
+            self.__board = BitBoard()
+        self.__board.set_player_turn(self.get_max_turn())
+
+    def get_board(self):
+        """Gets the :class:`BitBoard` linked to the current state.
+
+        Returns:
+            BitBoard: The board.
+        """
+        return self.__board
+
+    def get_action(self):
+        """Gets the state's action.
+        For a state reached by a :class:`BitMove`, the notation is only built on the first call.
+
+        Returns:
+            str: The state's action.
+        """
+        action = super().get_action()
+        if action is None and self.__move is not None:
+            action = str(self.__move)
+            self.set_action(action)
+        return action
+
+    def encode(self):
+        """Encodes the state in a compact, picklable form: the board's masks, the turn and the path.
+
+        Returns:
+            tuple: The encoded state.
+        """
+        board = self.__board
+        return ((board.get_player1_mask(), board.get_player2_mask(), board.get_kings_mask()),
+                self.get_max_turn(), self.get_path_keys())
+
+    @classmethod
+    def decode(cls, code, controller1, controller2):
+        """Rebuilds a state encoded by :meth:`encode`.
+
+        Args:
+            code (tuple): The encoded state.
+            controller1 (Controller): The controller for player 1.
+            controller2 (Controller): The controller for player 2.
+
+        Returns:
+            BitboardState: The state.
+        """
+        ((player1, player2, kings), max_turn, path) = code
+        state = cls(controller1=controller1, controller2=controller2)
+        state.restore_path(path, max_turn)
+        state.get_board().set_position(player1, player2, kings, max_turn)
+        return state
+
+    def get_successors(self):
+        """Generates a list of successors for the state.
+
+        Returns:
+            List[TwoPlayerGameState]: The successor states.
+        """
+        if self.__successors is None:
+            succs = []
+            for move in self.get_moves():
+                succs.append(self.get_successor(move))
+            self.__successors = succs
+        return self.__successors
+
+    def release_successors(self):
+        """Drops the successors and moves cached by the state, once it has been searched."""
+        self.__successors = None
+        self.__moves = None
+
+    def get_successor(self, move):
+        """Builds the successor reached by playing the given move.
+
+        Args:
+            move (BitMove): A move given by :meth:`get_moves`.
+
+        Returns:
+            BitboardState: The successor state.
+        """
+        new_board = BitBoard(board=self.__board)
+        new_board.apply_move(move)
+        return BitboardState(action=None, parent=self, board=new_board, move=move)
+
+    def get_moves(self):
+        """Generates the moves available from the state, without building successor states.
+
+        Returns:
+            List[BitMove]: The moves, as given by :meth:`BitBoard.generate_moves`.
+        """
+        if self.__moves is None:
+            self.__moves = self.__board.generate_moves()
+        return self.__moves
+
+    def iter_moves(self):
+        """Yields the moves available from the state one at a time, see :meth:`BitBoard.iter_moves`.
+
+        Returns:
+            Iterator[BitMove]: The moves, in the order of :meth:`get_moves`.
+        """
+        if self.__moves is not None:
+            return iter(self.__moves)
+        return self.__board.iter_moves()
+
+    def has_moves(self):
+        """Checks whether any move is available, without generating them.
+
+        Returns:
+            bool: True if the current player can move.
+        """
+        if self.__moves is not None:
+            return bool(self.__moves)
+        return self.__board.has_moves()
+
+    def has_jump(self):
+        """Checks whether the current player has to jump, without generating the jumps.
+
+        Returns:
+            bool: True if a jump is available.
+        """
+        if self.__moves is not None:
+            return bool(self.__moves) and self.__moves[0].get_num_captures() > 0
+        return bool(self.__board.get_jumpers())
+
+    def make_move(self, move):
+        """Plays the move on the state's own board, turning the state into its successor.
+
+        Args:
+            move (BitMove): A move given by :meth:`get_moves`.
+
+        Returns:
+            tuple: The information needed by :meth:`unmake_move` to restore the state.
+        """
+        path = self.push_path()
+        board = self.__board
+        undo = (path, self.__moves, self.__successors, board.get_player1_mask(),
+                board.get_player2_mask(), board.get_kings_mask())
+        board.apply_move(move)
+        self.__moves = None
+        self.__successors = None
+        return undo
+
+    def unmake_move(self, undo):
+        """Takes back a move played by :meth:`make_move`.
+
+        Args:
+            undo (tuple): The value returned by :meth:`make_move`.
+        """
+        (path, self.__moves, self.__successors, player1, player2, kings) = undo
+        self.__board.set_position(player1, player2, kings, not self.__board.get_player_turn())
+        self.pop_path(path)
+
+    def decode_move(self, key):
+        """Rebuilds a move from the packed integer given by :meth:`BitMove.get_key`.
+
+        Args:
+            key (int): The packed move.
+
+        Returns:
+            BitMove: The move.
+        """
+        return self.__board.decode_move(key)
+
+    def get_hashable_state(self):
+        """Provides a hashable object that uniquely defines the state.
+
+        Returns:
+            hashable: A hashable object.
+        """
+        return self.__board.get_key()
+
+    def print_state(self):
+        """Prints a string representation of the state.
+        """
+        self.__board.print_board()
+
+    def get_utility_value(self):
+        """Provides the utility value of the state.
+
+        Returns:
+            float: The utility value of the state.
+        """
+        return self.__board.get_utility_value()
+
+    def get_num_pieces(self):
+        """Counts the pieces left on the board, of both players.
+
+        Returns:
+            int: The number of pieces.
+        """
+        return count(self.__board.get_player1_mask() | self.__board.get_player2_mask())
+
+    def is_end_state(self):
+        """Determines if the game has ended.
+
+        Returns:
+            bool: True if game ended. False otherwise.
+        """
+        return (self.__board.get_winner() is not None or
+                not self.has_moves() or self.check_path())
+
+    def get_winner(self):
+        """Retrieves the winner once the game has ended
+
+        Returns:
+            Controller: The winning controller. None otherwise.
+        """
+        winner = self.__board.get_winner()
+        if winner is None and not self.has_moves():
+            winner = not self.get_max_turn()
+        if winner is None:
+            return None
+        return self.get_controller1() if winner else self.get_controller2()
+
+class BitBoard:
+    """A bitboard class. Stores a Checkers position as three 32-bit masks.
+
+    Args:
+        board (Optional[BitBoard]): The board to copy the position from.
+    """
+
+    def __init__(self, board=None):
+        if board:
+            self.__player1 = board.get_player1_mask()
+            self.__player2 = board.get_player2_mask()
+            self.__kings = board.get_kings_mask()
+            self.__player_turn = board.get_player_turn()
+        else:
+            self.__player1 = PLAYER1_START
+            self.__player2 = PLAYER2_START
+            self.__kings = 0
+            self.__player_turn = True
+
+    def set_position(self, player1, player2, kings, player_turn=True):
+        """
+        Sets the position of the board.
+
+        Args:
+            player1 (int): The mask of player 1's pieces.
+            player2 (int): The mask of player 2's pieces.
+            kings (int): The mask of kings.
+            player_turn (Optional[bool]): True if it's Player 1's turn, False otherwise.
+        """
+        self.__player1 = player1
+        self.__player2 = player2
+        self.__kings = kings
+        self.__player_turn = player_turn
+
+    def get_player1_mask(self):
+        """
+        Gets the squares holding player 1's pieces.
+
+        Returns:
+            int: The mask of player 1's pieces.
+        """
+        return self.__player1
+
+    def get_player2_mask(self):
+        """
+        Gets the squares holding player 2's pieces.
+
+        Returns:
+            int: The mask of player 2's pieces.
+        """
+        return self.__player2
+
+    def get_kings_mask(self):
+        """
+        Gets the squares holding kings of either player.
+
+        Returns:
+            int: The mask of kings.
+        """
+        return self.__kings
+
+    def get_player_turn(self):
+        """
+        Gets the player's turn.
+
+        Returns:
+            bool: True if it's Player 1's turn, False otherwise.
+        """
+        return self.__player_turn
+
+    def set_player_turn(self,player_turn):
+        """
+        Sets the player's turn.
+
+        Args:
+            player_turn (bool): Player's turn. True if it's Player 1's turn, False otherwise.
+        """
+        self.__player_turn = player_turn
+
+    def get_key(self):
+        """
+        Packs the position into a single integer.
+
+        Returns:
+            int: The packed position, including the side to move.
+        """
+        return (self.__player1 | (self.__player2 << 32) | (self.__kings << 64) |
+                ((1 if self.__player_turn else 0) << 96))
+
+    def get_utility_value(self):
+        """
+        Gets the utility value of the board.
+
+        Returns:
+            float: The utility value.
+        """
+        if not self.__player2:
+            return float(1)
+        elif not self.__player1:
+            return float(-1)
+        king_val = ai_config.Config.KING_VAL
+        value1 = count(self.__player1 & ~self.__kings) + king_val*count(self.__player1 & self.__kings)
+        value2 = count(self.__player2 & ~self.__kings) + king_val*count(self.__player2 & self.__kings)
+        return float(value1 - value2)/(king_val*12)
+
+    def get_winner(self):
+        """
+        Gets the winning player, or None if no player won yet.
+
+        Returns:
+            bool: True if player 1 won, False if player 2 won, None otherwise.
+        """
+        return True if not self.__player2 else False if not self.__player1 else None
+
+    def get_jumpers(self):
+        """
+        Finds the pieces of the current player that have a jump available,
+        without generating the jumps themselves.
+
+        Returns:
+            int: The mask of pieces that can jump.
+        """
+        if self.__player_turn:
+            (own, enemy, forward) = (self.__player1, self.__player2, UP_DIRECTIONS)
+        else:
+            (own, enemy, forward) = (self.__player2, self.__player1, DOWN_DIRECTIONS)
+        empty = ~(own | enemy) & FULL
+        own_kings = own & self.__kings
+        jumpers = 0
+        for direction in KING_DIRECTIONS:
+            back = 3 - direction
+            movers = own if direction in forward else own_kings
+            jumpers |= step(step(empty, back) & enemy, back) & movers
+        return jumpers
+
+    def generate_moves(self):
+        """
+        Generates the moves available to the current player.
+        Jumps are mandatory, so regular moves are only given when no jump exists.
+
+        Returns:
+            List[BitMove]: The available moves.
+        """
+        return list(self.iter_moves())
+
+    def iter_moves(self):
+        """
+        Yields the moves available to the current player one at a time, in the order of :meth:`generate_moves`.
+        Whether a jump exists is found with :meth:`get_jumpers` first, so regular moves are never built
+        when a jump is mandatory.
+
+        Yields:
+            BitMove: The next move.
+        """
+        if self.__player_turn:
+            (own, enemy, forward, crown) = (self.__player1, self.__player2, UP_DIRECTIONS, PLAYER1_CROWN)
+        else:
+            (own, enemy, forward, crown) = (self.__player2, self.__player1, DOWN_DIRECTIONS, PLAYER2_CROWN)
+        empty = ~(own | enemy) & FULL
+        kings = self.__kings
+
+        jumpers = self.get_jumpers()
+        if jumpers:
+            for square in squares(jumpers):
+                jumps = []
+                self.__add_jumps(square, bool(kings & (1 << square)), forward, crown, enemy, empty, (square,), 0, jumps)
+                for move in jumps:
+                    yield move
+            return
+
+        for square in squares(own):
+            bit = 1 << square
+            is_king = bool(kings & bit)
+            for direction in (KING_DIRECTIONS if is_king else forward):
+                dest = step(bit, direction) & empty
+                if dest:
+                    yield BitMove((square, dest.bit_length() - 1), 0, is_king or bool(dest & crown))
+
+    def has_moves(self):
+        """
+        Checks whether the current player has any move available, without generating them.
+
+        Returns:
+            bool: True if a move exists.
+        """
+        if self.__player_turn:
+            (own, forward) = (self.__player1, UP_DIRECTIONS)
+        else:
+            (own, forward) = (self.__player2, DOWN_DIRECTIONS)
+        empty = ~(self.__player1 | self.__player2) & FULL
+        own_kings = own & self.__kings
+        for direction in KING_DIRECTIONS:
+            movers = own if direction in forward else own_kings
+            if step(empty, 3 - direction) & movers:
+                return True
+        return bool(self.get_jumpers())
+
+    def __add_jumps(self, square, is_king, forward, crown, enemy, empty, path, captured, moves):
+        """
+        Recursively follows the jumps of a piece, adding every maximal jump sequence.
+        Captured pieces are removed as soon as they are jumped, like :meth:`checkers_state.Board.jumpMove`.
+        """
+        bit = 1 << square
+        found = False
+        for direction in (KING_DIRECTIONS if is_king else forward):
+            over = step(bit, direction) & enemy
+            if over:
+                land = step(over, direction) & empty
+                if land:
+                    found = True
+                    self.__add_jumps(land.bit_length() - 1, is_king or bool(land & crown),
+                                     forward, crown, enemy & ~over, (empty | bit | over) & ~land,
+                                     path + (land.bit_length() - 1,), captured | over, moves)
+        if not found and captured:
+            moves.append(BitMove(path, captured, is_king))
+
+    def decode_move(self, key):
+        """
+        Rebuilds a move of the current player from the value given by :meth:`BitMove.get_key`.
+
+        Args:
+            key (int): The packed move.
+
+        Returns:
+            BitMove: The move.
+        """
+        length = key & 0xF
+        key >>= 4
+        path = []
+        for _ in range(length):
+            path.append(key & 0x1F)
+            key >>= 5
+        crown = PLAYER1_CROWN if self.__player_turn else PLAYER2_CROWN
+        is_king = bool(self.__kings & (1 << path[0]))
+        captured = 0
+        for i in range(1, length):
+            (x1, y1) = square_to_coord(path[i-1])
+            (x2, y2) = square_to_coord(path[i])
+            if abs(y2 - y1) == 2:
+                captured |= 1 << coord_to_square((x1 + x2)//2, (y1 + y2)//2)
+            is_king = is_king or bool((1 << path[i]) & crown)
+        return BitMove(tuple(path), captured, is_king)
+
+    def apply_move(self, move):
+        """
+        Plays the move on the board and passes the turn.
+
+        Args:
+            move (BitMove): A move given by :meth:`generate_moves`.
+        """
+        path = move.get_path()
+        captured = move.get_captured()
+        from_bit = 1 << path[0]
+        to_bit = 1 << path[-1]
+        if self.__player_turn:
+            self.__player1 = (self.__player1 & ~from_bit) | to_bit
+            self.__player2 &= ~captured
+        else:
+            self.__player2 = (self.__player2 & ~from_bit) | to_bit
+            self.__player1 &= ~captured
+        self.__kings &= ~(captured | from_bit)
+        if move.get_is_king():
+            self.__kings |= to_bit
+        self.__player_turn = not self.__player_turn
+
+    def print_board(self):
+        """
+        Prints the board onto the standard output.
+        """
+        print(str(self))
+
+    def __str__(self):
+        final_str = ''
+        for y in range(8,-1,-1):
+            for x in range(9):
+                if y == 0:
+                    final_str += ' '+chr(ord('A')+(x-1)) if (x>0) else '  '
+                elif x == 0:
+                    final_str += ' '+str(y)
+                else:
+                    final_str += ' '+self.__square_str(x-1,y-1)
+            final_str += '\n'
+        return final_str
+
+    def __square_str(self, x, y):
+        square = coord_to_square(x, y)
+        if square is None:
+            return " "
+        bit = 1 << square
+        if self.__player1 & bit:
+            piece_str = 'o'
+        elif self.__player2 & bit:
+            piece_str = 'x'
+        else:
+            return " "
+        return piece_str.upper() if self.__kings & bit else piece_str
+
+class BitMove:
+    """A move class for the :class:`BitBoard`.
+    Printing the move gives its notation, e.g. 'F2-E3' or 'F2-D4-F6'.
+
+    Args:
+        path (tuple): The squares the piece lands on, starting with its origin.
+        captured (int): The mask of the captured pieces.
+        is_king (bool): Whether the piece is a king once the move is over.
+    """
+
+    __slots__ = ('__path', '__captured', '__is_king')
+
+    def __init__(self, path, captured, is_king):
+        self.__path = path
+        self.__captured = captured
+        self.__is_king = is_king
+
+    def get_path(self):
+        """
+        Gets the squares the piece lands on, starting with its origin.
+
+        Returns:
+            tuple: The squares of the path.
+        """
+        return self.__path
+
+    def get_captured(self):
+        """
+        Gets the squares of the pieces captured by the move.
+
+        Returns:
+            int: The mask of captured pieces.
+        """
+        return self.__captured
+
+    def get_num_captures(self):
+        """
+        Gets the number of pieces captured by the move.
+
+        Returns:
+            int: The number of captured pieces.
+        """
+        return count(self.__captured)
+
+    def get_is_king(self):
+        """
+        Gets whether the piece is a king once the move is over.
+
+        Returns:
+            bool: True if the piece ends the move as a king.
+        """
+        return self.__is_king
+
+    def get_key(self):
+        """
+        Packs the move into a single integer, 5 bits per square after a 4 bit length.
+
+        Returns:
+            int: The packed move.
+        """
+        key = 0
+        for square in reversed(self.__path):
+            key = (key << 5) | square
+        return (key << 4) | len(self.__path)
+
+    def __eq__(self, other):
+        return isinstance(other, BitMove) and self.__path == other.get_path()
+
+    def __hash__(self):
+        return hash(self.__path)
+
+    def __str__(self):
+        return "-".join(square_name(square) for square in self.__path)
+
+    def __repr__(self):
+        return str(self)
@@ -3,6 +3,49 @@
 
 import search_engine
 import ai_config
+import random
+
+def make_zobrist_keys(seed=2016):
+    """
+    Generates the random keys used for Zobrist hashing of a :class:`Board`.
+    
+    Args:
+        seed (Optional[int]): The seed for the random generator, so that keys are the same between runs.
+    
+    Returns:
+        (List[List[int]], int): A 64-bit key per (piece kind, square) and the key for player 1's turn.
+        The piece kinds are player 1's piece, player 1's king, player 2's piece and player 2's king.
+    """
+    rand = random.Random(seed)
+    keys = [[rand.getrandbits(64) for _ in range(64)] for _ in range(4)]
+    return (keys, rand.getrandbits(64))
+
+def make_move_tables():
+    """
+    Computes the steps and jumps a piece can make from each square of a :class:`Board`, 
+    so that move generation needs no bounds checks.
+    
+    Returns:
+        (List[List[Tuple[int]]], List[List[Tuple[(int, int)]]]): The in-bounds squares a piece can step to, 
+        and the (jumped square, landing square) pairs of its jumps, indexed by piece kind then square.
+        The piece kinds are :attr:`Piece.up`, :attr:`Piece.down` and 2 for kings; squares are ``y*8 + x``.
+        The directions are in the order of :meth:`Piece.get_moves`.
+    """
+    directions = [[(-1, 1), (1, 1)], [(-1, -1), (1, -1)], [(-1, -1), (-1, 1), (1, -1), (1, 1)]]
+    steps = []
+    jumps = []
+    for deltas in directions:
+        kind_steps = []
+        kind_jumps = []
+        for square in range(64):
+            (x, y) = (square & 7, square >> 3)
+            kind_steps.append(tuple((y+dy)*8 + x+dx for (dx, dy) in deltas 
+                                    if 0 <= x+dx < 8 and 0 <= y+dy < 8))
+            kind_jumps.append(tuple(((y+dy)*8 + x+dx, (y+2*dy)*8 + x+2*dx) for (dx, dy) in deltas 
+                                    if 0 <= x+2*dx < 8 and 0 <= y+2*dy < 8))
+        steps.append(kind_steps)
+        jumps.append(kind_jumps)
+    return (steps, jumps)
 
 class CheckersState(search_engine.TwoPlayerGameState):
     """A state class. Used to define a Checkers game state.
@@ -11,13 +54,19 @@ class CheckersState(search_engine.TwoPlayerGameState):
         parent (Optional[CheckersState]): The predecessor state.
         controller1 (Optional[Controller]): The controller for the player that will start first (MAX).
         controller2 (Optional[Controller]): The controller for the player that will start second (MIN).
+        move (Optional[Move]): The move played from the parent state to reach this state.
+        sibling (Optional[CheckersState]): A state with the same parent, whose board holds the parent's 
+            position, see :meth:`Board.jumpMove`. The move is played from that position.
     
-    .. note:: The state must be provided either a parent state, or controller 1 and controller 2.
+    .. note:: The state must be provided either a parent state, a sibling state, or controller 1 and controller 2.
 
     """
-    def __init__(self,action="START",parent=None,controller1=None,controller2=None, board=None):
+    def __init__(self,action="START",parent=None,controller1=None,controller2=None, board=None, move=None,
+                 sibling=None):
 
         self.__successors = None
+        self.__moves = None
+        self.__move = move
 
         if board:
             super().__init__(action = action, parent = parent,
@@ -27,11 +76,14 @@ class CheckersState(search_engine.TwoPlayerGameState):
             self.__board = Board(board=board,state=self)
         else:
             super().__init__(action = action, parent = parent,
-                         controller1 = controller1, controller2 = controller2)
+                         controller1 = controller1, controller2 = controller2, sibling = sibling)
 
-            if parent:
-                parent_board = parent.get_board()
+            if parent or sibling:
+                parent_board = (sibling or parent).get_board()
                 self.__board = Board(board=parent_board,state=self)
+                if move is not None:
+                    self.__board.make_move(move)
+                    self.__board.set_player_turn(self.get_max_turn())
             else:
                 self.__board = Board(controller1,controller2,state=self) 
         
@@ -50,44 +102,104 @@ class CheckersState(search_engine.TwoPlayerGameState):
         Returns:
             List[TwoPlayerGameState]: The successor states.
         """
-        if self.__successors:
-            return self.__successors
-        else:
-            succs = []
-            for piece in self.__board.get_current_player().get_pieces():
-                (x_old, y_old) = piece.get_position().get_coord()
-                for (x, y) in piece.get_moves():
-                    if self.__board.is_in_bounds(x, y):
-                        
-                        new_state = CheckersState(parent=self)
-                        
-                        new_piece = new_state.get_board().get_pos(x_old, y_old).get_piece()
-                        
-                        if not new_piece:
-                            print("uh oh no new_piece")
-    
-                        jump_succs = new_state.get_board().jumpMove(new_piece, (x, y))
-                        succs.extend(jump_succs)
-                
-            if not succs:
-                #No jumps available. Can move normally now.
-                for piece in self.__board.get_current_player().get_pieces():
-                    (x_old, y_old) = piece.get_position().get_coord()
-                    for (x, y) in piece.get_moves():
-                        if self.__board.is_in_bounds(x, y):
-                            
-                            new_state = CheckersState(parent=self)
-                            
-                            new_piece = new_state.get_board().get_pos(x_old, y_old).get_piece()
-                            
-                            if not new_piece:
-                                print("uh oh no new_piece")
-                                
-                            if new_state.get_board().regMove(new_piece, (x, y)):
-                                #print("move (", chr(ord('A') + (x_old)) ,  y_old + 1, " - ", chr(ord('A') + (x)), y+1, ")", sep="")
-                                succs.append(new_state)
-            self.__successors = succs
-            return succs
+        if self.__successors is None:
+            self.__successors = [self.get_successor(move) for move in self.get_moves()]
+        return self.__successors
+    
+    def release_successors(self):
+        """Drops the successors and moves cached by the state, once it has been searched."""
+        self.__successors = None
+        self.__moves = None
+    
+    def get_successor(self, move):
+        """Builds the successor reached by playing the given move.
+    
+        Args:
+            move (Move): A move given by :meth:`get_moves`.
+            
+        Returns:
+            CheckersState: The successor state.
+        """
+        return CheckersState(action=None, parent=self, move=move)
+    
+    def decode_move(self, key):
+        """Rebuilds a move from the packed integer given by :meth:`Move.get_key`.
+    
+        Args:
+            key (int): The packed move.
+            
+        Returns:
+            Move: The move.
+        """
+        return Move.from_key(key)
+    
+    def get_move(self):
+        """Gets the move that led to the state.
+    
+        Returns:
+            Move: The move, or None for a state that was not reached by a move.
+        """
+        return self.__move
+    
+    def get_action(self):
+        """Get's the state's action. 
+        For a state reached by a :class:`Move`, the notation is only built on the first call.
+        
+        Returns:
+            str: The state's action.
+        """
+        action = super().get_action()
+        if action is None and self.__move is not None:
+            action = str(self.__move)
+            self.set_action(action)
+        return action
+    
+    def get_moves(self):
+        """Generates the moves available from the state, without building successor states.
+        The moves are in the same order as :meth:`get_successors`.
+    
+        Returns:
+            List[Move]: The moves, as given by :meth:`Board.generate_moves`.
+        """
+        if self.__moves is None:
+            self.__moves = self.__board.generate_moves()
+        return self.__moves
+    
+    def iter_moves(self):
+        """Yields the moves available from the state one at a time, see :meth:`Board.iter_moves`.
+        Moves after a cutoff are never built.
+    
+        Returns:
+            Iterator[Move]: The moves, in the order of :meth:`get_moves`.
+        """
+        if self.__moves is not None:
+            return iter(self.__moves)
+        return self.__board.iter_moves()
+    
+    def make_move(self, move):
+        """Plays the move on the state's own board, turning the state into its successor.
+    
+        Args:
+            move (Move): A move given by :meth:`get_moves`.
+            
+        Returns:
+            tuple: The information needed by :meth:`unmake_move` to restore the state.
+        """
+        path = self.push_path()
+        undo = (path, self.__moves, self.__successors, self.__board.make_move(move))
+        self.__moves = None
+        self.__successors = None
+        return undo
+    
+    def unmake_move(self, undo):
+        """Takes back a move played by :meth:`make_move`.
+    
+        Args:
+            undo (tuple): The value returned by :meth:`make_move`.
+        """
+        (path, self.__moves, self.__successors, board_undo) = undo
+        self.__board.unmake_move(board_undo)
+        self.pop_path(path)
     
     def get_hashable_state(self):
         """Provides a hashable object that uniquely defines the state.
@@ -95,7 +207,34 @@ class CheckersState(search_engine.TwoPlayerGameState):
         Returns:
             hashable: A hashable object.
         """
-        return str(self.__board)
+        return self.__board.get_hash()
+    
+    def encode(self):
+        """Encodes the state in a compact, picklable form: the board's masks, see :meth:`Board.get_masks`, 
+        the turn and the path.
+    
+        Returns:
+            tuple: The encoded state.
+        """
+        return (self.__board.get_masks(), self.get_max_turn(), self.get_path_keys())
+    
+    @classmethod
+    def decode(cls, code, controller1, controller2):
+        """Rebuilds a state encoded by :meth:`encode`.
+    
+        Args:
+            code (tuple): The encoded state.
+            controller1 (Controller): The controller for player 1.
+            controller2 (Controller): The controller for player 2.
+            
+        Returns:
+            CheckersState: The state.
+        """
+        ((player1, player2, kings), max_turn, path) = code
+        state = cls(controller1=controller1, controller2=controller2)
+        state.restore_path(path, max_turn)
+        state.get_board().set_position(player1, player2, kings, max_turn)
+        return state
         
     def print_state(self):
         """Prints a string representation of the state.
@@ -110,22 +249,42 @@ class CheckersState(search_engine.TwoPlayerGameState):
         """
         return self.__board.get_utility_value()
     
+    def get_num_pieces(self):
+        """Counts the pieces left on the board, of both players.
+    
+        Returns:
+            int: The number of pieces.
+        """
+        return self.__board.get_player1().get_num_pieces() + self.__board.get_player2().get_num_pieces()
+    
     def is_end_state(self):
         """Determines if the game has ended.
     
         Returns:
             bool: True if game ended. False otherwise.
         """
-        successors = self.get_successors()
         board_winner = self.__board.get_winner()
-        stale_mate = False
-        state = self.get_parent()
-        while state is not None:
-            if state.get_hashable_state() == self.get_hashable_state():
-                stale_mate = True
-            state = state.get_parent()
-        
-        return (board_winner is not None or (not successors) or stale_mate)
+        return (board_winner is not None or (not self.has_moves()) or self.check_path())
+    
+    def has_moves(self):
+        """Checks whether any move is available, without generating them all.
+    
+        Returns:
+            bool: True if the current player can move.
+        """
+        if self.__moves is not None:
+            return bool(self.__moves)
+        return self.__board.has_moves()
+    
+    def has_jump(self):
+        """Checks whether the current player has to jump, without generating the jumps.
+    
+        Returns:
+            bool: True if a jump is available.
+        """
+        if self.__moves is not None:
+            return bool(self.__moves) and self.__moves[0].get_num_captures() > 0
+        return self.__board.has_jump()
     
     def get_winner(self):
         """Retrieves the winner once the game has ended
@@ -133,7 +292,7 @@ class CheckersState(search_engine.TwoPlayerGameState):
         Returns:
             Controller: The winning controller. None otherwise.
         """
-        successors = self.get_successors()
+        successors = self.has_moves()
         board_winner = self.__board.get_winner()
         if not successors:
             lock_winner = self.get_controller2() if self.get_max_turn() else self.get_controller1()
@@ -154,8 +313,12 @@ class Board:
     width = 8 #: int: Width of the checkers board.
     height = 8 #: int: Height of the checkers board.
     
+    (zobrist_keys, zobrist_turn) = make_zobrist_keys() #: Keys for Zobrist hashing, see :func:`make_zobrist_keys`.
+    (step_table, jump_table) = make_move_tables() #: Steps and jumps by piece kind and square, see :func:`make_move_tables`.
+    
     def __init__(self, controller1=None, controller2=None, board=None, state=None):
         self.__state = state
+        self.__hash = 0
         if board:
             self.__player1 = CheckersPlayer(board=self,player=board.get_player1())
             self.__player2 = CheckersPlayer(board=self,player=board.get_player2())
@@ -170,7 +333,7 @@ class Board:
                     old_pos = board.get_pos(x,y)
                     old_piece = old_pos.get_piece()
                     if old_piece:
-                        is_player_1 = old_piece in board.get_player1().get_pieces()
+                        is_player_1 = old_piece.get_player() is board.get_player1()
                         position = Position(self,x,y)
                         piece = Piece(player=self.__player1 if
                                       is_player_1 else self.__player2,
@@ -205,6 +368,10 @@ class Board:
                     else:
                         row.append(Position(self,x,y))
                 self.__board.append(row)
+        # The positions indexed by square, y*8 + x
+        self.__squares = [position for row in self.__board for position in row]
+        if self.__player_turn:
+            self.__hash ^= Board.zobrist_turn
 
     def get_relevant_player(self,controller):
         """
@@ -254,6 +421,49 @@ class Board:
         """
         return self.__player_turn
     
+    def get_masks(self):
+        """
+        Gets the position of the board as masks of squares, where square y*8+x is bit y*8+x.
+        
+        Returns:
+            (int, int, int): The masks of player 1's pieces, player 2's pieces and kings.
+        """
+        masks = [0, 0, 0]
+        for row in self.__board:
+            for position in row:
+                piece = position.get_piece()
+                if piece:
+                    (x, y) = position.get_coord()
+                    bit = 1 << (y*8 + x)
+                    masks[0 if piece.get_player() is self.__player1 else 1] |= bit
+                    if piece.get_is_king():
+                        masks[2] |= bit
+        return tuple(masks)
+    
+    def set_position(self, player1, player2, kings, player_turn=True):
+        """
+        Sets the position of the board, replacing all of its pieces.
+        
+        Args:
+            player1 (int): The mask of player 1's pieces, see :meth:`get_masks`.
+            player2 (int): The mask of player 2's pieces.
+            kings (int): The mask of kings.
+            player_turn (Optional[bool]): True if it's Player 1's turn, False otherwise.
+        """
+        for player in (self.__player1, self.__player2):
+            for piece in player.get_pieces():
+                player.remove_piece(piece)
+        for y in range(Board.height):
+            for x in range(Board.width):
+                bit = 1 << (y*8 + x)
+                if (player1 | player2) & bit:
+                    if player1 & bit:
+                        piece = Piece(self.__player1, Piece.up, self.__board[y][x])
+                    else:
+                        piece = Piece(self.__player2, Piece.down, self.__board[y][x])
+                    piece.set_king(bool(kings & bit))
+        self.set_player_turn(player_turn)
+    
     def set_player_turn(self,player_turn):
         """
         Gets the player's turn.
@@ -261,18 +471,61 @@ class Board:
         Args:
             player_turn (bool): Player's turn. True if it's Player 1's turn, False otherwise.
         """
+        if player_turn != self.__player_turn:
+            self.__hash ^= Board.zobrist_turn
         self.__player_turn = player_turn
     
+    def get_hash(self):
+        """
+        Gets the Zobrist hash of the board, including the side to move.
+        The hash is kept up to date as pieces are placed, removed and crowned.
+            
+        Returns:
+            int: The 64-bit hash.
+        """
+        return self.__hash
+    
+    def compute_hash(self):
+        """
+        Computes the Zobrist hash of the board from scratch.
+            
+        Returns:
+            int: The 64-bit hash, equal to :meth:`get_hash`.
+        """
+        key = Board.zobrist_turn if self.__player_turn else 0
+        for row in self.__board:
+            for position in row:
+                piece = position.get_piece()
+                if piece:
+                    key ^= self.__piece_key(piece, position)
+        return key
+    
+    def update_hash(self, piece, position):
+        """
+        Toggles the piece at the given position in the Zobrist hash.
+        Called when a piece is placed on or removed from a :class:`Position`.
+            
+        Args:
+            piece (Piece): The piece placed or removed.
+            position (Position): The position of the piece.
+        """
+        self.__hash ^= self.__piece_key(piece, position)
+        
+    def __piece_key(self, piece, position):
+        (x, y) = position.get_coord()
+        kind = (0 if piece.get_player() is self.__player1 else 2) + (1 if piece.get_is_king() else 0)
+        return Board.zobrist_keys[kind][y*8+x]
+    
     def get_utility_value(self):
         """
-        Gets the utility value of the board.
+        Gets the utility value of the board, in constant time from the players' piece counts.
             
         Returns:
             int: The utility value.
         """
-        if self.get_winner() == self.__player1:
+        if not self.__player2.get_num_pieces():
             return float(1)
-        elif self.get_winner() == self.__player2:
+        elif not self.__player1.get_num_pieces():
             return float(-1)
         else:
             return float(self.__player1.get_value() - self.__player2.get_value())/(ai_config.Config.KING_VAL*12)
@@ -284,7 +537,8 @@ class Board:
         Returns:
             CheckersPlayer: The winning player.
         """
-        return self.__player1 if not self.__player2.get_pieces() else self.__player2 if not self.__player1.get_pieces() else None
+        return (self.__player1 if not self.__player2.get_num_pieces() else 
+                self.__player2 if not self.__player1.get_num_pieces() else None)
 
     def is_in_bounds(self, x, y):
         """
@@ -343,17 +597,174 @@ class Board:
         """
         self.__state = state
 
+    def generate_moves(self):
+        """
+        Generates the moves available to the current player, on this board.
+        Jumps are mandatory, so regular moves are only given when no jump exists.
+        Multiple jumps are followed by playing and taking back each jump in place.
+        
+        Returns:
+            List[Move]: The moves, in board scan order of the pieces.
+        """
+        return list(self.iter_moves())
+    
+    def iter_moves(self):
+        """
+        Yields the moves available to the current player one at a time, in the order of :meth:`generate_moves`.
+        Whether a jump exists is checked first with :meth:`has_jump`, so regular moves are never built
+        when a jump is mandatory, and the jumps of a piece are only followed once the previous piece's moves were used.
+        
+        .. note:: The board may be changed between moves, as long as it is restored before the next one is asked for.
+        
+        Yields:
+            Move: The next move.
+        """
+        pieces = self.__current_pieces()
+        if self.has_jump():
+            for piece in pieces:
+                jumps = []
+                self.__find_jumps(piece, (piece.get_position().get_square(),), jumps)
+                for move in jumps:
+                    yield move
+            return
+        
+        squares = self.__squares
+        for piece in pieces:
+            origin = piece.get_position().get_square()
+            for target in Board.step_table[piece.get_kind()][origin]:
+                if not squares[target].get_piece():
+                    yield Move((origin, target))
+    
+    def has_jump(self):
+        """
+        Checks whether the current player has a jump available, without following it.
+        
+        Returns:
+            bool: True if a jump exists.
+        """
+        squares = self.__squares
+        for piece in self.__current_pieces():
+            player = piece.get_player()
+            for (over, landing) in Board.jump_table[piece.get_kind()][piece.get_position().get_square()]:
+                over_piece = squares[over].get_piece()
+                if over_piece is not None and over_piece.get_player() is not player and not squares[landing].get_piece():
+                    return True
+        return False
+    
+    def has_moves(self):
+        """
+        Checks whether the current player has any move available, without generating them all.
+        
+        Returns:
+            bool: True if a move exists.
+        """
+        squares = self.__squares
+        for piece in self.__current_pieces():
+            for target in Board.step_table[piece.get_kind()][piece.get_position().get_square()]:
+                if not squares[target].get_piece():
+                    return True
+        return self.has_jump()
+    
+    def __current_pieces(self):
+        """
+        Lists the current player's pieces in board scan order.
+        """
+        player = self.get_current_player()
+        pieces = []
+        for row in self.__board:
+            for position in row:
+                piece = position.get_piece()
+                if piece and piece.get_player() is player:
+                    pieces.append(piece)
+        return pieces
+    
+    def __find_jumps(self, piece, path, moves):
+        """
+        Follows the jumps of a piece depth-first, adding every maximal jump sequence to moves.
+        """
+        square = path[-1]
+        squares = self.__squares
+        player = piece.get_player()
+        found = False
+        for (over, landing) in Board.jump_table[piece.get_kind()][square]:
+            over_piece = squares[over].get_piece()
+            if over_piece is not None and over_piece.get_player() is not player and not squares[landing].get_piece():
+                found = True
+                undo = self.__play((square, landing))
+                self.__find_jumps(piece, path + (landing,), moves)
+                self.__take_back(undo)
+        if not found and len(path) > 1:
+            moves.append(Move(path))
+    
+    def make_move(self, move):
+        """
+        Plays the move on this board, including captures and promotion, and passes the turn.
+        
+        Args:
+            move (Move): A move given by :meth:`generate_moves`.
+            
+        Returns:
+            tuple: The information needed by :meth:`unmake_move` to take the move back.
+        """
+        undo = self.__play(move.get_path())
+        self.set_player_turn(not self.__player_turn)
+        return undo
+    
+    def unmake_move(self, undo):
+        """
+        Takes back a move played by :meth:`make_move`.
+        
+        Args:
+            undo (tuple): The value returned by :meth:`make_move`.
+        """
+        self.set_player_turn(not self.__player_turn)
+        self.__take_back(undo)
+        
+    def __play(self, path):
+        """
+        Moves the piece along the path of squares, removing the pieces it jumps over.
+        """
+        squares = self.__squares
+        square = path[0]
+        piece = squares[square].get_piece()
+        was_king = piece.get_is_king()
+        captured = []
+        for next_square in path[1:]:
+            if abs(next_square - square) > 9:
+                position = squares[(square + next_square) >> 1]
+                taken = position.get_piece()
+                captured.append((taken, position))
+                taken.get_player().remove_piece(taken)
+            piece.set_position(squares[next_square])
+            square = next_square
+        return (path[0], piece, was_king, captured)
+    
+    def __take_back(self, undo):
+        """
+        Undoes :meth:`__play`.
+        """
+        (square, piece, was_king, captured) = undo
+        piece.set_king(was_king)
+        piece.set_position(self.__squares[square])
+        for (taken, position) in reversed(captured):
+            position.set_piece(taken)
+            taken.get_player().add_piece(taken)
+
     def jumpMove(self, piece, coordinate, action = None):
         """
         Move the piece past the Position indicated by the coordinate (jump).
-        handles collisions
+        The capture sequences starting with this jump are followed depth-first on this board,
+        taking back each jump like :meth:`generate_moves`, and a state is only built for each 
+        complete sequence. The board itself is left unchanged.
 
         Args:
            piece (Piece): piece to move
-           coordinate (int, int): destination
-           action (str): The action string to build up recursively. Don't provide this argument.
+           coordinate (int, int): the position of the piece to jump over
+           action (str): Not used, kept for compatibility.
         Return: 
-           List[CheckersState]: A list of valid states generated by jumps.
+           List[CheckersState]: A list of valid states generated by jumps, one per maximal jump sequence,
+           as successors of the parent of the board's state. They are built beside the board's state, 
+           so the parent does not need to be alive.
         """
         
         (x, y) = coordinate
@@ -361,53 +772,24 @@ class Board:
         if not self.is_in_bounds(x, y):
             raise search_engine.AIError("out of bounds")
 
-        dest_piece = self.get_pos(x, y).get_piece()
+        squares = self.__squares
+        origin = piece.get_position().get_square()
+        over = y*8 + x
+        over_piece = squares[over].get_piece()
+        if over_piece is None or over_piece.get_player() is piece.get_player():
+            return []
+        for (jumped, landing) in Board.jump_table[piece.get_kind()][origin]:
+            if jumped == over and not squares[landing].get_piece():
+                break
+        else:
+            # can't jump over, so it behaves like a collision
+            return []
         
-        if dest_piece != None and dest_piece.get_player() != piece.get_player():
-            (x1, y1) = piece.get_position().get_coord()
-            (delta_x, delta_y) = (x - x1, y - y1)
-            (x_final, y_final) = (x + delta_x, y + delta_y)
-            
-            if ((not self.is_in_bounds(x_final, y_final)) or
-                self.get_pos(x_final, y_final).get_piece()):
-                # can't jump over, so it behaves like a collision
-                return []
-            else:
-                #print("removing a piece")
-                
-                # kill enemy and jump over
-                dest_piece.get_player().remove_piece(dest_piece)
-                piece.set_position(self.get_pos(x_final, y_final))
-                
-                new_states = []
-                
-                if action is None:
-                    action = chr(ord('A')+(x1))+str(y1+1) + "-" + chr(ord('A')+(x_final))+str(y_final+1)
-                else:
-                    action += "-" + chr(ord('A')+(x_final))+str(y_final+1)
-                self.get_state().set_action(action)
-                # check for double jumps
-                for (x_double, y_double) in piece.get_moves():
-                    if self.is_in_bounds(x_double, y_double):
-                        double_piece = self.get_pos(x_double, y_double).get_piece()
-                        if (double_piece != None and double_piece.get_player() != piece.get_player()):
-                            # we may be able to double jump, try it
-                            new_state = CheckersState(action="", parent=self.__state.get_parent(), board=self)
-                            new_piece = new_state.get_board().get_pos(x_final, y_final).get_piece()
-                            
-                            next_jump_states = new_state.get_board().jumpMove(new_piece, (x_double, y_double), action = action)
-                            new_states.extend( next_jump_states )
-                            
-                            # quit after first double jump
-                            #return True
-
-                #print("jump (", chr(ord('A') + (x_orig)) ,  y_orig + 1, " - ", chr(ord('A') + (x)), y+1, ")", sep="")
-                if new_states:
-                    return new_states
-                else:
-                    self.get_state().get_board().set_player_turn(not self.get_state().get_parent().get_max_turn())
-                    return [self.get_state()]
-        return []
+        moves = []
+        undo = self.__play((origin, landing))
+        self.__find_jumps(piece, (origin, landing), moves)
+        self.__take_back(undo)
+        return [CheckersState(action=None, sibling=self.__state, move=move) for move in moves]
 
     def regMove(self, piece, coordinate):
         """
@@ -521,6 +903,112 @@ class Board:
             final_str += '\n'
         return final_str
 
+class Move:
+    """A move class. A compact description of a move, played with :meth:`Board.make_move`.
+    
+    Squares are numbered ``y*8 + x``, so 'A1' is 0 and 'H8' is 63.
+    The notation of the move (e.g. 'F2-D4-F6') is only built when it is printed.
+    
+    Args:
+        path (tuple): The squares the piece lands on, starting with its origin.
+    """
+    
+    __slots__ = ('__path',)
+    
+    def __init__(self, path):
+        self.__path = path
+        
+    def get_path(self):
+        """
+        Gets the squares the piece lands on, starting with its origin.
+        
+        Returns:
+            tuple: The squares of the path.
+        """
+        return self.__path
+    
+    def get_from(self):
+        """
+        Gets the square the piece starts on.
+        
+        Returns:
+            int: The origin square.
+        """
+        return self.__path[0]
+    
+    def get_to(self):
+        """
+        Gets the square the piece ends on.
+        
+        Returns:
+            int: The destination square.
+        """
+        return self.__path[-1]
+    
+    def get_captured(self):
+        """
+        Gets the squares of the pieces captured by the move.
+        
+        Returns:
+            tuple: The captured squares, in the order they are jumped.
+        """
+        path = self.__path
+        return tuple((path[i] + path[i+1]) >> 1 for i in range(len(path) - 1)
+                     if abs(path[i+1] - path[i]) > 9)
+    
+    def get_num_captures(self):
+        """
+        Gets the number of pieces captured by the move.
+        
+        Returns:
+            int: The number of captured pieces.
+        """
+        path = self.__path
+        return len(path) - 1 if abs(path[1] - path[0]) > 9 else 0
+    
+    def get_key(self):
+        """
+        Packs the move into a single integer, 6 bits per square after a 4 bit length.
+        
+        Returns:
+            int: The packed move.
+        """
+        key = 0
+        for square in reversed(self.__path):
+            key = (key << 6) | square
+        return (key << 4) | len(self.__path)
+    
+    @staticmethod
+    def from_key(key):
+        """
+        Rebuilds a move from the value given by :meth:`get_key`.
+        
+        Args:
+            key (int): The packed move.
+            
+        Returns:
+            Move: The move.
+        """
+        length = key & 0xF
+        key >>= 4
+        path = []
+        for _ in range(length):
+            path.append(key & 0x3F)
+            key >>= 6
+        return Move(tuple(path))
+    
+    def __eq__(self, other):
+        return isinstance(other, Move) and self.__path == other.get_path()
+    
+    def __hash__(self):
+        return hash(self.__path)
+    
+    def __str__(self):
+        return "-".join(chr(ord('A')+(square & 7))+str((square >> 3)+1) for square in self.__path)
+    
+    def __repr__(self):
+        return str(self)
+    
 class Position:
     """A position class. Used for define positions on the checkers board.
     
@@ -534,6 +1022,7 @@ class Position:
         self.__board = board
         self.__x = x
         self.__y = y
+        self.__square = y*8 + x
         self.__piece = None
         
         self.set_piece(piece)
@@ -546,11 +1035,22 @@ class Position:
             Position: The piece inside the position.
         """
         return self.__piece
+    
+    def get_board(self):
+        """
+        Gets the board the position is in.
+        
+        Returns:
+            Board: The board.
+        """
+        return self.__board
 
     """
     May need to be removed.
     """
     def clear(self):
+        if self.__piece:
+            self.__board.update_hash(self.__piece, self)
         self.__piece = None
         
     def set_piece(self,piece):
@@ -562,6 +1062,11 @@ class Position:
         """
         if piece and piece.get_position() is not self:
             piece.set_position(self)
+        if piece is not self.__piece:
+            if self.__piece:
+                self.__board.update_hash(self.__piece, self)
+            if piece:
+                self.__board.update_hash(piece, self)
         self.__piece = piece
 
     def get_coord(self):
@@ -570,6 +1075,15 @@ class Position:
             a tuple (x, y) representing the position
         """
         return (self.__x, self.__y)
+    
+    def get_square(self):
+        """
+        Gets the square number of the position, as used by :class:`Move`.
+        
+        Returns:
+            int: The square, ``y*8 + x``.
+        """
+        return self.__square
         
     def __str__(self):
         return str(self.__piece) if (self.__piece) else " "
@@ -600,8 +1114,9 @@ class Piece:
         else:
             self.__is_king = False
         
-        self.set_position(position)
+        # Added first, so that the player counts the piece if it is crowned on its position
         player.add_piece(self)
+        self.set_position(position)
 
     def get_direction(self):
         """
@@ -612,11 +1127,23 @@ class Piece:
         """
         return self.__direction
         
-    def set_king(self):
+    def set_king(self, is_king=True):
         """
         Change the type of :class:`.Piece` to a king.
-        """
-        self.__is_king = True
+        
+        Args:
+            is_king (Optional[bool]): False to turn a king back into a regular piece, when a move is taken back.
+        """
+        if self.__is_king == is_king:
+            return
+        position = self.__position
+        on_board = position is not None and position.get_piece() is self
+        if on_board:
+            position.get_board().update_hash(self, position)
+            self.__player.update_kings(1 if is_king else -1)
+        self.__is_king = is_king
+        if on_board:
+            position.get_board().update_hash(self, position)
         
     def get_is_king(self):
         """
@@ -626,6 +1153,15 @@ class Piece:
             bool: True if king, False otherwise.
         """
         return self.__is_king
+    
+    def get_kind(self):
+        """
+        Gets the kind of the piece, which indexes :attr:`Board.step_table` and :attr:`Board.jump_table`.
+        
+        Returns:
+            int: 2 for a king, otherwise the piece's direction.
+        """
+        return 2 if self.__is_king else self.__direction
         
     def set_position(self,position):
         """
@@ -729,6 +1265,7 @@ class CheckersPlayer():
         else:
             self.__controller = controller
         self.__pieces = []
+        self.__num_kings = 0
         
     def get_controller(self):
         """
@@ -756,6 +1293,25 @@ class CheckersPlayer():
             List[Piece]: A list of the player's pieces.
         """
         return list(self.__pieces)
+    
+    def get_num_pieces(self):
+        """
+        Gets the number of the player's pieces, without copying them.
+                    
+        Returns:
+            int: The number of pieces.
+        """
+        return len(self.__pieces)
+    
+    def get_num_kings(self):
+        """
+        Gets the number of the player's kings. The count is kept up to date as pieces are 
+        added, removed and crowned.
+                    
+        Returns:
+            int: The number of kings.
+        """
+        return self.__num_kings
         
     def add_piece(self,piece):
         """
@@ -765,6 +1321,8 @@ class CheckersPlayer():
             piece (Piece): The piece to add.  
         """
         self.__pieces.append(piece)
+        if piece.get_is_king():
+            self.__num_kings += 1
         
     def remove_piece(self,piece):
         """
@@ -775,17 +1333,26 @@ class CheckersPlayer():
         """
         if piece in self.__pieces:
             self.__pieces.remove(piece)
+            if piece.get_is_king():
+                self.__num_kings -= 1
             piece.get_position().clear()
+    
+    def update_kings(self, change):
+        """
+        Updates the number of kings when one of the player's pieces on the board is crowned,
+        or uncrowned when a move is taken back. Called by :meth:`Piece.set_king`.
+
+        Args:
+            change (int): 1 for a crowned piece, -1 for an uncrowned one.
+        """
+        self.__num_kings += change
         
     def get_value(self):
         """
-        Gets the value of the player's pieces.
+        Gets the value of the player's pieces, in constant time from the piece and king counts.
             
         Returns:
             int: The sum of the player's pieces' values.
         """
-        val_sum = 0
-        for piece in self.__pieces:
-            val_sum += piece.get_value()
-        return val_sum
+        return len(self.__pieces) + (ai_config.Config.KING_VAL - 1) * self.__num_kings
     
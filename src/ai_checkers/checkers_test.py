@@ -1,5 +1,15 @@
 import unittest
+import multiprocessing
+import multiprocessing.shared_memory
+import gc
+import os
+import random
+import tempfile
+import tracemalloc
 import checkers_state
+import bitboard_state
+import endgame_tablebase
+import benchmarks
 import search_engine
 import ai_config
 
@@ -82,6 +92,171 @@ class AITestCase(unittest.TestCase):
             
         self.assertTrue(childList is not None)
         self.assertEqual(len(childList),1,"Wrong number of successors!")
+
+    def test_jump_move(self):
+        controller1 = search_engine.AIController()
+        controller2 = search_engine.AIController()
+        state = checkers_state.CheckersState(board=checkers_state.Board(controller1, controller2))
+        for step in AITestCase.test_steps2[:-1]:
+            state = state.get_successor([m for m in state.get_moves() if str(m) == step][0])
+        # The double jump is followed on the board, which is left as it was
+        child = checkers_state.CheckersState(parent=state)
+        board = child.get_board()
+        before = str(board)
+        expected = state.get_successors()[0]
+        # The parent is only weakly referenced, and the jumps do not need it
+        del state
+        gc.collect()
+        self.assertIsNone(child.get_parent(), "Parent was kept alive!")
+        jumps = board.jumpMove(board.get_pos(7, 3).get_piece(), (6, 4))
+        self.assertEqual(str(board), before, "Board was changed!")
+        self.assertEqual([s.get_action() for s in jumps], ["H4-F6-D8"], "Wrong jump sequences!")
+        self.assertEqual(str(jumps[0].get_board()), str(expected.get_board()))
+        self.assertEqual(jumps[0].get_hashable_state(), expected.get_hashable_state(), "Wrong position!")
+        self.assertEqual(jumps[0].get_max_turn(), expected.get_max_turn(), "Wrong turn!")
+        self.assertEqual(jumps[0].get_path_keys(), expected.get_path_keys(), "Wrong path!")
+        self.assertEqual(board.jumpMove(board.get_pos(7, 3).get_piece(), (6, 2)), [], "Jumped an empty square!")
+
+    def test_game_history(self):
+        history = search_engine.GameHistory()
+        rng = random.Random(7)
+        paths = [None]
+        for _ in range(300):
+            # Extend a random path, as sibling and cousin states do, and count on another one
+            path = search_engine.GameHistory.push(rng.choice(paths), rng.randrange(6))
+            paths.append(path)
+            node = rng.choice(paths)
+            keys = search_engine.GameHistory.get_keys(node)
+            for key in range(6):
+                self.assertEqual(history.count(node, key), keys.count(key), "Wrong repetition count!")
+        # A position played again is found on the path
+        controller1 = search_engine.AIController()
+        controller2 = search_engine.AIController()
+        state = checkers_state.CheckersState(board=checkers_state.Board(controller1, controller2))
+        state.get_board().set_position(1 << 0, 1 << 63, (1 << 0) | (1 << 63))
+        for step in ["A1-B2", "H8-G7", "B2-A1", "G7-H8"]:
+            self.assertFalse(state.check_path(), "Repetition found too early!")
+            state = state.get_successor([m for m in state.get_moves() if str(m) == step][0])
+        self.assertTrue(state.check_path(), "Repetition not found!")
+        self.assertTrue(state.is_end_state(), "Repetition should end the game!")
+
+    def test_hash(self):
+        controller1 = search_engine.AIController()
+        controller2 = search_engine.AIController()
+        board = checkers_state.Board(controller1, controller2)
+        state = checkers_state.CheckersState(board=board)
+        rng = random.Random(3)
+        seen = dict()
+        for _ in range(80):
+            board = state.get_board()
+            self.assertEqual(board.get_hash(), board.compute_hash(), "Incremental hash is out of date!")
+            key = (str(board), state.get_max_turn())
+            self.assertEqual(seen.setdefault(state.get_hashable_state(), key), key, "Hash collision!")
+            if state.is_end_state():
+                break
+            state = rng.choice(state.get_successors())
+        
+    def test_make_unmake(self):
+        controller1 = search_engine.AIController()
+        controller2 = search_engine.AIController()
+        board = checkers_state.Board(controller1, controller2)
+        state = checkers_state.CheckersState(board=board)
+        rng = random.Random(5)
+        for _ in range(80):
+            if state.is_end_state():
+                break
+            before = (str(state.get_board()), state.get_hashable_state(), state.get_max_turn())
+            childList = state.get_successors()
+            moves = state.get_moves()
+            self.assertEqual(len(moves), len(childList), "Moves do not match successors!")
+            for move, c in zip(moves, childList):
+                undo = state.make_move(move)
+                self.assertEqual(str(state.get_board()), str(c.get_board()), "Move played incorrectly!")
+                self.assertEqual(state.get_hashable_state(), c.get_hashable_state(), "Hash after move is incorrect!")
+                self.assertEqual(state.get_max_turn(), c.get_max_turn(), "Turn after move is incorrect!")
+                state.unmake_move(undo)
+                self.assertEqual((str(state.get_board()), state.get_hashable_state(), state.get_max_turn()),
+                                 before, "Move taken back incorrectly!")
+            state = rng.choice(childList)
+        
+    def test_material(self):
+        controller1 = search_engine.AIController()
+        controller2 = search_engine.AIController()
+        state = checkers_state.CheckersState(board=checkers_state.Board(controller1, controller2))
+        rng = random.Random(13)
+        kings = 0
+        for _ in range(200):
+            if state.is_end_state():
+                break
+            # The counts kept on the board match the pieces, after moves and after taking them back
+            for move in state.get_moves():
+                undo = state.make_move(move)
+                for player in (state.get_board().get_player1(), state.get_board().get_player2()):
+                    pieces = player.get_pieces()
+                    self.assertEqual(player.get_num_pieces(), len(pieces))
+                    self.assertEqual(player.get_num_kings(), sum(1 for piece in pieces if piece.get_is_king()))
+                    self.assertEqual(player.get_value(), sum(piece.get_value() for piece in pieces))
+                    kings += player.get_num_kings()
+                state.unmake_move(undo)
+            state = rng.choice(state.get_successors())
+        self.assertGreater(kings, 0, "No piece was crowned!")
+
+    def test_move_tables(self):
+        board = checkers_state.Board(search_engine.AIController(), search_engine.AIController())
+        board.set_position(0, 0, 0)
+        player = board.get_player1()
+        for (kind, direction, is_king) in ((0, checkers_state.Piece.up, False), (1, checkers_state.Piece.down, False),
+                                           (2, checkers_state.Piece.up, True)):
+            for square in range(64):
+                # The tables give the in-bounds moves of Piece.get_moves, in the same order
+                position = board.get_pos(square & 7, square >> 3)
+                piece = checkers_state.Piece(player, direction, position)
+                piece.set_king(is_king or piece.get_is_king())
+                if piece.get_is_king() != is_king:
+                    player.remove_piece(piece)
+                    continue
+                self.assertEqual(piece.get_kind(), kind)
+                steps = [y*8 + x for (x, y) in piece.get_moves() if board.is_in_bounds(x, y)]
+                jumps = [(y*8 + x, (2*y - (square >> 3))*8 + 2*x - (square & 7)) for (x, y) in piece.get_moves() 
+                         if board.is_in_bounds(2*x - (square & 7), 2*y - (square >> 3))]
+                self.assertEqual(list(checkers_state.Board.step_table[kind][square]), steps, "Wrong steps!")
+                self.assertEqual(list(checkers_state.Board.jump_table[kind][square]), jumps, "Wrong jumps!")
+                player.remove_piece(piece)
+
+    def test_moves(self):
+        controller1 = search_engine.AIController()
+        controller2 = search_engine.AIController()
+        board = checkers_state.Board(controller1, controller2)
+        state = checkers_state.CheckersState(board=board)
+        for step in AITestCase.test_steps2[:-1]:
+            state = state.get_successor([m for m in state.get_moves() if str(m) == step][0])
+            self.assertEqual(state.get_action(), step, "Expected successor not found!")
+        moves = state.get_moves()
+        self.assertEqual([str(m) for m in moves], ["H4-F6-D8"], "Wrong moves generated!")
+        self.assertEqual(moves[0].get_captured(), (4*8+6, 6*8+4), "Wrong pieces captured!")
+        self.assertEqual(moves[0].get_num_captures(), 2, "Wrong number of captures!")
+        self.assertEqual(checkers_state.Move(moves[0].get_path()), moves[0], "Moves with the same path should be equal!")
+        self.assertEqual(checkers_state.Move.from_key(moves[0].get_key()), moves[0], "Move key does not round-trip!")
+        
+    def test_lazy_moves(self):
+        controller1 = search_engine.AIController()
+        controller2 = search_engine.AIController()
+        rng = random.Random(11)
+        for state in (checkers_state.CheckersState(board=checkers_state.Board(controller1, controller2)),
+                      bitboard_state.BitboardState(controller1=controller1, controller2=controller2)):
+            for _ in range(80):
+                moves = list(state.iter_moves())
+                self.assertEqual(state.has_moves(), bool(moves), "Wrong move availability!")
+                self.assertEqual(moves, state.get_moves(), "Lazy moves do not match!")
+                for move in moves:
+                    self.assertEqual(state.decode_move(move.get_key()).get_path(), move.get_path(), "Move key does not round-trip!")
+                if state.is_end_state():
+                    break
+                first = next(state.iter_successors())
+                # The notation is only built when the action is asked for
+                self.assertIsNone(search_engine.TwoPlayerGameState.get_action(first), "Action was built eagerly!")
+                self.assertEqual(first.get_action(), str(moves[0]), "Wrong first successor!")
+                state = state.get_successor(rng.choice(moves))
         
     def test_utility_function1(self):
         controller1 = search_engine.AIController()
@@ -155,5 +330,420 @@ class AITestCase(unittest.TestCase):
         # First two levels with the algorithm should prune off 36 from total of 7 * 8 available states.
         self.assertEqual(controller1.get_engine().get_num_explored(),20,"Wrong number of states explored!")
         
+    def test_transposition_table(self):
+        TT = search_engine.TranspositionTable
+        # A single bucket of 4 entries
+        table = TT(megabytes=TT.BUCKET_SIZE*TT.ENTRY_BYTES/2**20)
+        self.assertEqual(table.get_size(), TT.BUCKET_SIZE, "Wrong table size!")
+        for key in range(4):
+            table.store(key, key+1, 0.5, TT.LOWER, 7)
+        self.assertEqual(table.probe(2), (3, 0.5, TT.LOWER, 7), "Stored entry not found!")
+        table.store(10, 0, 0.0, TT.EXACT)
+        self.assertEqual(table.probe(10), None, "Shallow entry should not evict deeper ones!")
+        table.store(10, 3, 0.0, TT.EXACT)
+        self.assertEqual(table.probe(0), None, "Shallowest entry should be evicted!")
+        self.assertEqual(table.probe(10), (3, 0.0, TT.EXACT, 0), "New entry not found!")
+        stats = table.get_stats()
+        self.assertEqual((stats["probes"], stats["hits"], stats["collisions"]), (4, 2, 2), "Wrong table statistics!")
+        table.new_search()
+        table.store(11, 0, 0.0, TT.EXACT)
+        self.assertEqual(table.probe(1), None, "Entry of an earlier search should be evicted first!")
+        self.assertEqual(table.probe(3)[0], 4, "Deep entry should be kept!")
+        table = TT(megabytes=TT.BUCKET_SIZE*TT.ENTRY_BYTES/2**20, replacement="always")
+        for key in range(5):
+            table.store(key, 5-key, 0.0, TT.EXACT)
+        self.assertEqual(table.probe(4), (1, 0.0, TT.EXACT, 0), "Entry should always be stored!")
+        
+    def test_table_keys(self):
+        TT = search_engine.TranspositionTable
+        # hash() gives both packed positions the same value, as 2**64 is 8 modulo 2**61-1:
+        # a king on square 0 and a man on 3, against men on squares 0 and 4
+        board = bitboard_state.BitBoard()
+        board.set_position(0x9, bitboard_state.PLAYER2_START, 0x1)
+        key1 = board.get_key()
+        board.set_position(0x11, bitboard_state.PLAYER2_START, 0)
+        key2 = board.get_key()
+        self.assertNotEqual(TT.hash_key(key1), TT.hash_key(key2), "Packed positions collide!")
+        self.assertEqual(TT.hash_key(12345), TT.hash_key(12345), "Keys are not repeatable!")
+        shared = search_engine.SharedTranspositionTable(megabytes=0.001)
+        for table in (TT(megabytes=0.001), shared):
+            table.store(key1, 3, 0.5, TT.EXACT, 2050)
+            self.assertIsNone(table.probe(key2), "Other position's entry was found!")
+            self.assertEqual(table.probe(key1), (3, 0.5, TT.EXACT, 2050), "Stored entry not found!")
+        shared.close()
+        
+    def test_table_reuse(self):
+        controller1 = search_engine.AIController(mode="AlphaBeta", max_depth=5)
+        controller2 = search_engine.AIController()
+        board = checkers_state.Board(controller1, controller2)
+        state = checkers_state.CheckersState(board=board)
+        result = controller1.play_move(state)
+        num_explored = controller1.get_engine().get_num_explored()
+        again = controller1.play_move(state)
+        self.assertEqual(again.get_action(), result.get_action(), "Wrong state selected!")
+        self.assertLess(controller1.get_engine().get_num_explored(), num_explored, "Table was not reused!")
+        
+    def test_iterative_deepening(self):
+        controller1 = search_engine.AIController()
+        controller2 = search_engine.AIController()
+        board = checkers_state.Board(controller1, controller2)
+        state = checkers_state.CheckersState(board=board)
+        fixed = search_engine.SearchEngine(state, "AlphaBeta", 6).getNextState()
+        deepening = search_engine.SearchEngine(state, "AlphaBeta", 6, node_limit=10**6)
+        result = deepening.getNextState()
+        self.assertEqual(result.get_action(), fixed.get_action(), "Wrong state selected!")
+        self.assertEqual(deepening.get_depth_reached(), 6, "Search did not reach full depth!")
+        self.assertEqual(len(deepening.get_principal_variation()), 6, "Principal variation is incomplete!")
+        # A search out of budget returns the best move of its last completed iteration
+        limited = search_engine.SearchEngine(state, "AlphaBeta", 20, node_limit=200)
+        result = limited.getNextState()
+        self.assertIn(result.get_action(), [s.get_action() for s in state.get_successors()], "Illegal state selected!")
+        self.assertGreaterEqual(limited.get_depth_reached(), 1)
+        self.assertLess(limited.get_depth_reached(), 20)
+        self.assertEqual(str(state.get_board()), AITestCase.board_string, "Aborted search did not restore the board!")
+        
+    def test_move_ordering(self):
+        positions = benchmarks.benchmark_positions(num_positions=4)
+        (unordered, ordered) = benchmarks.compare_move_ordering(positions, 7)
+        self.assertLess(ordered[0], unordered[0], "Move ordering did not reduce the nodes explored!")
+        
+    def test_pvs(self):
+        for state in benchmarks.benchmark_positions(num_positions=4):
+            alphabeta = search_engine.SearchEngine(state, "AlphaBeta", 6)
+            alphabeta.getNextState()
+            pvs = search_engine.SearchEngine(state, "PVS", 6)
+            result = pvs.getNextState()
+            self.assertAlmostEqual(pvs.get_utility(), alphabeta.get_utility(), msg="Wrong utility value!")
+            self.assertIn(result.get_action(), [s.get_action() for s in state.get_successors()], "Illegal state selected!")
+        
+    def test_mtdf(self):
+        for state in benchmarks.benchmark_positions(num_positions=4):
+            alphabeta = search_engine.SearchEngine(state, "AlphaBeta", 6)
+            alphabeta.getNextState()
+            mtdf = search_engine.SearchEngine(state, "MTDf", 6)
+            result = mtdf.getNextState()
+            self.assertAlmostEqual(mtdf.get_utility(), alphabeta.get_utility(), msg="Wrong utility value!")
+            self.assertIn(result.get_action(), [s.get_action() for s in state.get_successors()], "Illegal state selected!")
+            if len(state.get_moves()) > 1:
+                passes = mtdf.get_mtdf_passes()
+                self.assertTrue(passes, "No passes recorded!")
+                self.assertEqual(sum(nodes for (_, _, nodes) in passes), mtdf.get_num_explored())
+        
+    def test_quiescence(self):
+        positions = benchmarks.benchmark_positions(num_positions=8, plies=16, seed=3)
+        quiescence_depth = ai_config.Config.QUIESCENCE_DEPTH
+        try:
+            ai_config.Config.QUIESCENCE_DEPTH = 0
+            plain = [search_engine.SearchEngine(state, "MiniMax", 3) for state in positions]
+            for engine in plain:
+                engine.getNextState()
+            ai_config.Config.QUIESCENCE_DEPTH = 8
+            quiet = [search_engine.SearchEngine(state, "MiniMax", 3) for state in positions]
+            for engine in quiet:
+                engine.getNextState()
+        finally:
+            ai_config.Config.QUIESCENCE_DEPTH = quiescence_depth
+        self.assertEqual([e.get_num_explored() for e in quiet], [e.get_num_explored() for e in plain])
+        self.assertEqual(sum(e.get_num_quiescence() for e in plain), 0)
+        self.assertGreater(sum(e.get_num_quiescence() for e in quiet), 0, "No exchange was followed!")
+        for (state, engine) in zip(positions, quiet):
+            alphabeta = search_engine.SearchEngine(state, "AlphaBeta", 3)
+            alphabeta.getNextState()
+            self.assertAlmostEqual(alphabeta.get_utility(), engine.get_utility(), msg="Wrong utility value!")
+        
+    def test_aspiration(self):
+        window = ai_config.Config.ASPIRATION_WINDOW
+        utilities = []
+        try:
+            for width in (0, 0.01):
+                ai_config.Config.ASPIRATION_WINDOW = width
+                controller1 = search_engine.AIController(mode="AlphaBeta", max_depth=5)
+                controller2 = search_engine.AIController(mode="PVS", max_depth=5)
+                board = checkers_state.Board(controller1, controller2)
+                state = checkers_state.CheckersState(board=board)
+                values = []
+                for _ in range(12):
+                    controller = controller1 if state.get_max_turn() else controller2
+                    state = controller.play_move(state)
+                    values.append(controller.get_engine().get_utility())
+                utilities.append(values)
+        finally:
+            ai_config.Config.ASPIRATION_WINDOW = window
+        for (plain, windowed) in zip(*utilities):
+            self.assertAlmostEqual(plain, windowed, msg="Wrong utility value!")
+        stats = controller1.get_engine().get_aspiration_stats()
+        self.assertGreater(stats["searches"], 0)
+        
+    def test_selective_search(self):
+        positions = benchmarks.benchmark_positions(num_positions=4)
+        (full, selective, _) = benchmarks.compare_selective(positions, 7, "AlphaBeta")
+        self.assertLess(selective[0], full[0], "Selective search did not reduce the nodes explored!")
+        with benchmarks.config_settings(LATE_MOVE_REDUCTION=True, FUTILITY_PRUNING=True):
+            for state in positions:
+                result = search_engine.SearchEngine(state, "PVS", 7).getNextState()
+                self.assertIn(result.get_action(), [s.get_action() for s in state.get_successors()], "Illegal state selected!")
+        self.assertFalse(ai_config.Config.LATE_MOVE_REDUCTION or ai_config.Config.FUTILITY_PRUNING, "Config not restored!")
+        
+    def test_parallel(self):
+        positions = benchmarks.benchmark_positions(num_positions=3)
+        for mode in ("AlphaBeta", "MiniMax"):
+            (_, _, different) = benchmarks.compare_parallel(positions, 4, 2, mode)
+            self.assertEqual(different, 0, "Parallel search chose another move!")
+        engine = search_engine.SearchEngine(positions[-1], "PVS", 5, workers=2)
+        engine.getNextState()
+        self.assertEqual(sum(engine.get_worker_nodes().values()), engine.get_num_explored())
+        # The workers start afresh, so an engine used on earlier moves chooses like a new serial engine
+        for state in positions:
+            engine.set_state(state)
+            serial = search_engine.SearchEngine(state, "PVS", 5)
+            self.assertEqual(engine.getNextState().get_action(), serial.getNextState().get_action(), 
+                             "Parallel search chose another move!")
+        engine = search_engine.SearchEngine(positions[0], "AlphaBeta", 3, time_limit=10, workers=2, parallel="root")
+        with self.assertWarns(RuntimeWarning):
+            engine.getNextState()
+        
+    def test_shared_table(self):
+        table = search_engine.SharedTranspositionTable(megabytes=0.001)
+        table.new_search()
+        table.store(10, 3, 0.5, search_engine.TranspositionTable.LOWER, 77)
+        self.assertEqual(table.probe(10), (3, 0.5, search_engine.TranspositionTable.LOWER, 77))
+        # Other processes see the entries, and their entries are seen
+        attached = search_engine.SharedTranspositionTable(megabytes=0.001, name=table.get_name())
+        self.assertEqual(attached.probe(10), (3, 0.5, search_engine.TranspositionTable.LOWER, 77))
+        attached.store(11, 2, -0.25, search_engine.TranspositionTable.EXACT)
+        self.assertEqual(table.peek(11), (2, -0.25, search_engine.TranspositionTable.EXACT, 0))
+        attached.close()
+        table.store(12, 4, 1.0, search_engine.TranspositionTable.EXACT, 5)
+        table.store(12, 1, 0.0, search_engine.TranspositionTable.UPPER, 5)
+        self.assertEqual(table.peek(12)[0], 4, "Deeper entry was replaced!")
+        # A half-written entry (here, a changed score) fails its check and reads as a miss
+        memory = multiprocessing.shared_memory.SharedMemory(table.get_name())
+        for offset in range(16, table.get_size() * search_engine.TranspositionTable.ENTRY_BYTES, 
+                            search_engine.TranspositionTable.ENTRY_BYTES):
+            memory.buf[offset] ^= 1
+        memory.close()
+        self.assertIsNone(table.peek(12), "Torn entry was read!")
+        table.close()
+        
+    def test_lazy_smp(self):
+        for state in benchmarks.benchmark_positions(num_positions=4)[::3]:
+            serial = search_engine.SearchEngine(state, "AlphaBeta", 6, node_limit=10**7)
+            serial.getNextState()
+            engine = search_engine.SearchEngine(state, "AlphaBeta", 6, workers=2, parallel="smp")
+            self.assertIsInstance(engine.get_table(), search_engine.SharedTranspositionTable)
+            result = engine.getNextState()
+            self.assertIn(result.get_action(), [s.get_action() for s in state.get_successors()], "Illegal state selected!")
+            self.assertEqual(engine.get_depth_reached(), 6, "Search did not reach full depth!")
+            self.assertEqual(sum(engine.get_worker_nodes().values()), engine.get_num_explored())
+            self.assertAlmostEqual(engine.get_utility(), serial.get_utility(), msg="Wrong utility value!")
+        
+    def test_ybw(self):
+        positions = benchmarks.benchmark_positions(num_positions=4)[::3]
+        for mode in ("AlphaBeta", "MTDf"):
+            for state in positions:
+                serial = search_engine.SearchEngine(state, mode, 7)
+                serial.getNextState()
+                engine = search_engine.SearchEngine(state, mode, 7, workers=2, parallel="ybw")
+                result = engine.getNextState()
+                self.assertIn(result.get_action(), [s.get_action() for s in state.get_successors()], "Illegal state selected!")
+                self.assertAlmostEqual(engine.get_utility(), serial.get_utility(), msg="Wrong utility value!")
+                self.assertGreater(sum(engine.get_worker_nodes().values()), 0, "No split was searched in parallel!")
+        engine = search_engine.SearchEngine(positions[0], "AlphaBeta", 3, time_limit=10, workers=2, parallel="ybw")
+        with self.assertWarns(RuntimeWarning):
+            engine.getNextState()
+        self.assertEqual(engine.get_worker_nodes(), {}, "Time-limited search was split!")
+        # States are sent to the workers encoded
+        state = positions[-1]
+        code = state.encode()
+        decoded = checkers_state.CheckersState.decode(code, search_engine.Controller(), search_engine.Controller())
+        self.assertEqual(str(decoded.get_board()), str(state.get_board()))
+        self.assertEqual(decoded.get_hashable_state(), state.get_hashable_state())
+        self.assertEqual(decoded.get_path_keys(), state.get_path_keys())
+        self.assertEqual([str(move) for move in decoded.get_moves()], [str(move) for move in state.get_moves()])
+        
+    def test_ybw_split(self):
+        state = benchmarks.benchmark_positions(num_positions=1)[0]
+        child = state.get_successor(state.get_moves()[0])
+        engine = search_engine.SearchEngine(workers=1)
+        token = multiprocessing.Value("i", 7, lock=False)
+        bound = multiprocessing.Value("d", 0.0, lock=False)
+        search_engine._init_ybw_worker("AlphaBeta", token, bound, None, None)
+        try:
+            # A worker of an earlier split, or of a node already cut off, stops at once
+            self.assertIsNone(engine.searchSplit(child, -1, 1, 1, 5, 6, bound), "Stale split was searched!")
+            bound.value = -1 if child.get_max_turn() else 1
+            self.assertIsNone(engine.searchSplit(child, -1, 1, 1, 5, 7, bound), "Closed window was searched!")
+            bound.value = 0.0
+            (val, nodes, _) = engine.searchSplit(child, -1, 1, 1, 5, 7, bound)
+            self.assertGreater(nodes, 0, "Split was not searched!")
+        finally:
+            search_engine._ybw_worker.clear()
+
+    def test_tree_reuse(self):
+        controller1 = search_engine.AIController(max_depth=6)
+        controller2 = search_engine.AIController(max_depth=6)
+        state = checkers_state.CheckersState(board=checkers_state.Board(controller1, controller2))
+        played = controller1.play_move(state)
+        first = controller1.fresh_nodes
+        reply = controller2.play_move(played)
+        # The next search starts from the results kept under the moves played
+        result = controller1.play_move(reply)
+        (reused, fresh) = controller1.get_engine().get_reuse_stats()
+        self.assertGreater(reused, 0, "No results were reused!")
+        self.assertEqual(reused + fresh, controller1.get_engine().get_num_explored(), "Nodes counted twice!")
+        cold = search_engine.SearchEngine(reply, "AlphaBeta", 6)
+        cold.getNextState()
+        self.assertLess(fresh, cold.get_num_explored(), "Warm search expanded more nodes!")
+        self.assertAlmostEqual(controller1.get_engine().get_utility(), cold.get_utility(), msg="Wrong utility value!")
+        self.assertIn(result.get_action(), [s.get_action() for s in reply.get_successors()], "Illegal state selected!")
+        self.assertEqual(controller1.fresh_nodes, first + fresh)
+        self.assertGreaterEqual(controller1.reused_nodes, reused)
+        
+    def test_memory(self):
+        controller1 = search_engine.AIController(max_depth=3)
+        controller2 = search_engine.AIController(max_depth=3)
+        state = checkers_state.CheckersState(board=checkers_state.Board(controller1, controller2))
+        sizes = []
+        tracemalloc.start()
+        try:
+            for move in range(100):
+                if state.is_end_state():
+                    break
+                state = (controller1 if state.get_max_turn() else controller2).play_move(state)
+                if move % 10 == 9:
+                    gc.collect()
+                    sizes.append(tracemalloc.get_traced_memory()[0])
+        finally:
+            tracemalloc.stop()
+        self.assertGreater(len(sizes), 5, "Game ended too early!")
+        # Earlier states are freed as the game goes on
+        self.assertLess(max(sizes) - sizes[0], 64*1024, "Memory grows over the game!")
+        
+    def test_ponder(self):
+        state = benchmarks.benchmark_positions(num_positions=1)[0]
+        engine = search_engine.SearchEngine(state, "AlphaBeta", 5)
+        played = engine.getNextState()
+        # Pondering every reply to completion, then playing one of them, is a ponder hit
+        stop = multiprocessing.Value("b", 0, lock=False)
+        engine.ponder(played, stop)
+        reply = played.get_successors()[-1]
+        engine.set_state(reply)
+        result = engine.getNextState()
+        self.assertEqual(engine.get_ponder_stats(), (1, 0))
+        self.assertEqual(engine.get_num_explored(), 0, "Ponder hit was searched again!")
+        serial = search_engine.SearchEngine(reply, "AlphaBeta", 5)
+        serial.getNextState()
+        self.assertIn(result.get_action(), [s.get_action() for s in reply.get_successors()], "Illegal state selected!")
+        self.assertAlmostEqual(engine.get_utility(), serial.get_utility(), msg="Wrong utility value!")
+        # Pondering in the background is stopped by the next search, which is then a ponder miss
+        engine.startPondering(result)
+        reply = result.get_successors()[0]
+        engine.set_state(reply)
+        result = engine.getNextState()
+        self.assertIn(result.get_action(), [s.get_action() for s in reply.get_successors()], "Illegal state selected!")
+        self.assertEqual(engine.get_ponder_stats(), (1, 1))
+        self.assertGreater(engine.get_num_explored(), 0)
+        # Pondering leaves the state's moves as they were, for the human to choose from
+        moves = result.get_moves()
+        before = [str(move) for move in moves]
+        stop.value = 1
+        engine.ponder(result, stop, predicted=moves[-1].get_key())
+        engine.startPondering(result)
+        engine.stopPondering()
+        self.assertIs(result.get_moves(), moves, "Move list was replaced!")
+        self.assertEqual([str(move) for move in result.get_moves()], before, "Move list was changed!")
+        self.assertEqual([s.get_action() for s in result.get_successors()], before, "Moves and successors differ!")
+
+class BitboardTestCase(unittest.TestCase):
+    
+    def test_init(self):
+        controller1 = search_engine.AIController()
+        controller2 = search_engine.AIController()
+        state = bitboard_state.BitboardState(controller1=controller1, controller2=controller2)
+        self.assertEqual(str(state.get_board()), AITestCase.board_string, "Board initialization failed!")
+        self.assertEqual(len(state.get_successors()), 7, "Number of successors is incorrect.")
+        
+    def test_double_jump_successors(self):
+        controller1 = search_engine.AIController()
+        controller2 = search_engine.AIController()
+        state = bitboard_state.BitboardState(controller1=controller1, controller2=controller2)
+        for i, step in enumerate(AITestCase.test_steps2):
+            childList = state.get_successors()
+            for c in childList:
+                if c.get_action() == step:
+                    state = c
+            self.assertEqual(state.get_action(),step,"Expected successor not found!")
+            self.assertEqual(state.get_utility_value(),AITestCase.test_utility2[i],"Expected utility value not found!")
+        self.assertEqual(len(childList),1,"Wrong number of successors!")
+        
+    def test_matches_board(self):
+        rng = random.Random(7)
+        for _ in range(5):
+            controller1 = search_engine.Controller()
+            controller2 = search_engine.Controller()
+            state = checkers_state.CheckersState(board=checkers_state.Board(controller1, controller2))
+            bit_state = bitboard_state.BitboardState(controller1=controller1, controller2=controller2)
+            for _ in range(60):
+                self.assertEqual(str(bit_state.get_board()), str(state.get_board()), "Boards diverged!")
+                actions = [c.get_action() for c in state.get_successors()]
+                self.assertEqual([c.get_action() for c in bit_state.get_successors()], actions, "Successors differ!")
+                self.assertEqual(bit_state.get_utility_value(), state.get_utility_value(), "Utility values differ!")
+                self.assertEqual(bit_state.is_end_state(), state.is_end_state(), "End states differ!")
+                if state.is_end_state():
+                    self.assertIs(bit_state.get_winner(), state.get_winner(), "Winners differ!")
+                    break
+                i = rng.randrange(len(actions))
+                state = state.get_successors()[i]
+                bit_state = bit_state.get_successors()[i]
+                
+    def test_alphabeta(self):
+        controller1 = search_engine.AIController(mode="AlphaBeta", max_depth=3)
+        controller2 = search_engine.AIController()
+        state = checkers_state.CheckersState(board=checkers_state.Board(controller1, controller2))
+        bit_state = bitboard_state.BitboardState(controller1=controller1, controller2=controller2)
+        for step in AITestCase.test_steps1[:2]:
+            state = [c for c in state.get_successors() if c.get_action() == step][0]
+            bit_state = [c for c in bit_state.get_successors() if c.get_action() == step][0]
+        result = controller1.play_move(state)
+        num_explored = controller1.get_engine().get_num_explored()
+        bit_result = controller1.play_move(bit_state)
+        self.assertEqual(bit_result.get_action(), result.get_action(), "Wrong state selected!")
+        self.assertEqual(controller1.get_engine().get_num_explored(), num_explored, "Wrong number of states explored!")
+        
+    def test_tablebase(self):
+        (handle, path) = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            endgame_tablebase.build_tablebase(2, workers=2, path=path)
+            tablebase = endgame_tablebase.Tablebase(path)
+        finally:
+            os.remove(path)
+        self.assertEqual(tablebase.get_max_pieces(), 2, "Wrong number of pieces!")
+        square = bitboard_state.coord_to_square
+        # A man on A7 blocked by a king on B8 cannot move
+        self.assertEqual(tablebase.probe_masks(1 << square(0, 6), 1 << square(1, 7), 1 << square(1, 7), True), 
+                         (-1, 0), "Blocked man not lost!")
+        self.assertIsNone(tablebase.probe_masks(0x3, 1 << 31, 0, True), "Three pieces found in the tablebase!")
+        
+        controller1 = search_engine.AIController(mode="AlphaBeta", max_depth=3, tablebase=tablebase)
+        controller2 = search_engine.AIController()
+        # A king on C1 wins against a man on D4 in three plies
+        bit_state = bitboard_state.BitboardState(controller1=controller1, controller2=controller2)
+        bit_state.get_board().set_position(1 << square(2, 0), 1 << square(3, 3), 1 << square(2, 0))
+        state = checkers_state.CheckersState(board=checkers_state.Board(controller1, controller2))
+        state.get_board().set_position(1 << 2, 1 << 27, 1 << 2)
+        self.assertEqual(tablebase.probe(bit_state), (1, 3), "Wrong tablebase result!")
+        self.assertEqual(tablebase.probe(state), (1, 3), "Board and bitboard results differ!")
+        self.assertEqual(bit_state.get_num_pieces(), 2, "Wrong number of pieces!")
+        self.assertEqual(state.get_num_pieces(), 2, "Wrong number of pieces!")
+        
+        engine = controller1.get_engine()
+        controller1.play_move(bit_state)
+        (probes, hits) = engine.get_tablebase_stats()
+        self.assertEqual(hits, probes, "Tablebase probe missed!")
+        self.assertGreater(hits, 0, "Tablebase not probed!")
+        self.assertAlmostEqual(engine.get_utility(), 1 - 2*search_engine.SearchEngine.TABLEBASE_PLY, 9, 
+                               "Tablebase win not found!")
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
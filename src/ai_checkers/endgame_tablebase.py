@@ -0,0 +1,438 @@
+"""The module containing the endgame tablebase.
+
+The tablebase holds the result (win, loss or draw) and the distance to the end of the game, in plies,
+of every position with up to a given number of pieces, for the side to move. It is built offline by
+retrograde analysis: from the positions where the side to move has lost, back through their predecessors,
+see :func:`build_tablebase`. The :class:`.SearchEngine` probes it once few enough pieces are left.
+
+The positions are split in material classes, by the numbers of men and kings of each player,
+and each class is indexed by the ranks of the squares of its four kinds of pieces (see :func:`rank`) and the turn.
+The file stores one byte per index: 0 for squares that cannot hold the position, 1 for a draw,
+and the distance plus 2 otherwise. Wins are an odd number of plies away, and losses an even one.
+
+Example:
+    You can build the tablebase for up to 3 pieces by using::
+
+        $ python endgame_tablebase.py 3 tablebase.bin
+
+"""
+
+import bitboard_state
+import search_engine
+import array
+import multiprocessing
+import os
+import struct
+import sys
+import time
+
+MAGIC = b"CKTB" #: bytes: The first bytes of a tablebase file.
+VERSION = 1 #: int: The version of the file format.
+HEADER = struct.Struct("<4sBBI") #: struct.Struct: The magic bytes, version, maximum number of pieces and number of classes.
+CLASS_HEADER = struct.Struct("<BBBBI") #: struct.Struct: The material of a class and the offset of its results.
+
+INVALID = 0 #: int: The stored value of an index that does not hold a position.
+DRAW = 1 #: int: The stored value of a draw.
+MAX_PLIES = 253 #: int: The longest distance stored. Longer ones are stored as 252 or 253 plies, keeping the result.
+
+MEN_SQUARES = 28 #: int: The number of squares a man can stand on, all but its crown row.
+
+BINOMIAL = [[0]*33 for _ in range(33)] #: List[List[int]]: The binomial coefficients, BINOMIAL[n][k] for n and k up to 32.
+for n in range(33):
+    BINOMIAL[n][0] = 1
+    for k in range(1, n+1):
+        BINOMIAL[n][k] = BINOMIAL[n-1][k-1] + BINOMIAL[n-1][k]
+
+def rank(mask, shift=0):
+    """
+    Ranks a set of squares among the sets of the same size, in colexicographic order.
+
+    Args:
+        mask (int): The squares.
+        shift (Optional[int]): The lowest square the pieces can stand on, which is ranked as square 0.
+
+    Returns:
+        int: The rank, from 0 to the number of sets of that size, minus 1.
+    """
+    result = 0
+    for (i, square) in enumerate(bitboard_state.squares(mask >> shift)):
+        result += BINOMIAL[square][i+1]
+    return result
+
+def get_class_size(material):
+    """
+    Gets the number of indices of a material class.
+
+    Args:
+        material ((int, int, int, int)): The numbers of player 1's men and kings, then of player 2's men and kings.
+
+    Returns:
+        int: The number of indices, with both turns.
+    """
+    (men1, kings1, men2, kings2) = material
+    return (BINOMIAL[MEN_SQUARES][men1] * BINOMIAL[32][kings1] *
+            BINOMIAL[MEN_SQUARES][men2] * BINOMIAL[32][kings2] * 2)
+
+def get_index(material, player1, player2, kings, player_turn):
+    """
+    Gets the index of a position within its material class.
+
+    Args:
+        material ((int, int, int, int)): The material class of the position.
+        player1 (int): The mask of player 1's pieces, see :class:`.BitBoard`.
+        player2 (int): The mask of player 2's pieces.
+        kings (int): The mask of kings.
+        player_turn (bool): True if it's Player 1's turn, False otherwise.
+
+    Returns:
+        int: The index.
+    """
+    (men1, kings1, men2, kings2) = material
+    index = rank(player1 & ~kings)
+    index = index*BINOMIAL[32][kings1] + rank(player1 & kings)
+    index = index*BINOMIAL[MEN_SQUARES][men2] + rank(player2 & ~kings, 32 - MEN_SQUARES)
+    index = index*BINOMIAL[32][kings2] + rank(player2 & kings)
+    return index*2 + (1 if player_turn else 0)
+
+def get_material(player1, player2, kings):
+    """
+    Gets the material class of a position.
+
+    Args:
+        player1 (int): The mask of player 1's pieces.
+        player2 (int): The mask of player 2's pieces.
+        kings (int): The mask of kings.
+
+    Returns:
+        (int, int, int, int): The numbers of player 1's men and kings, then of player 2's men and kings.
+    """
+    count = bitboard_state.count
+    return (count(player1 & ~kings), count(player1 & kings), count(player2 & ~kings), count(player2 & kings))
+
+def get_classes(max_pieces):
+    """
+    Lists the material classes with up to the given number of pieces, and at least one piece for each player.
+
+    Args:
+        max_pieces (int): The largest number of pieces.
+
+    Returns:
+        List[(int, int, int, int)]: The material classes.
+    """
+    classes = []
+    for total in range(2, max_pieces+1):
+        for pieces1 in range(1, total):
+            for kings1 in range(pieces1+1):
+                for kings2 in range(total-pieces1+1):
+                    classes.append((pieces1-kings1, kings1, total-pieces1-kings2, kings2))
+    return classes
+
+def get_square_masks(state):
+    """
+    Gets the position of a state as masks of the 32 playable squares, see :class:`.BitBoard`.
+
+    Args:
+        state (TwoPlayerGameState): A :class:`.BitboardState` or a :class:`.CheckersState`.
+
+    Returns:
+        (int, int, int): The masks of player 1's pieces, player 2's pieces and kings.
+    """
+    board = state.get_board()
+    if isinstance(board, bitboard_state.BitBoard):
+        return (board.get_player1_mask(), board.get_player2_mask(), board.get_kings_mask())
+    masks = []
+    # The board's masks have bit y*8+x for square (x, y)
+    for mask in board.get_masks():
+        squares = 0
+        while mask:
+            low = mask & -mask
+            bit = low.bit_length() - 1
+            squares |= 1 << bitboard_state.coord_to_square(bit % 8, bit // 8)
+            mask ^= low
+        masks.append(squares)
+    return tuple(masks)
+
+def _iter_positions(material):
+    """Yields the masks of player 1's pieces, player 2's pieces and kings of every position of a material class."""
+    (men1, kings1, men2, kings2) = material
+    men_squares1 = bitboard_state.FULL & ~bitboard_state.PLAYER1_CROWN
+    men_squares2 = bitboard_state.FULL & ~bitboard_state.PLAYER2_CROWN
+    for mask1 in _iter_masks(men_squares1, men1, 0):
+        for king_mask1 in _iter_masks(bitboard_state.FULL, kings1, mask1):
+            for mask2 in _iter_masks(men_squares2, men2, mask1 | king_mask1):
+                for king_mask2 in _iter_masks(bitboard_state.FULL, kings2, mask1 | king_mask1 | mask2):
+                    yield (mask1 | king_mask1, mask2 | king_mask2, king_mask1 | king_mask2)
+
+def _iter_masks(allowed, size, taken):
+    """Yields every mask of the given size within the allowed squares, avoiding the taken squares."""
+    free = bitboard_state.squares(allowed & ~taken)
+    def extend(start, size, mask):
+        if not size:
+            yield mask
+            return
+        for i in range(start, len(free) - size + 1):
+            yield from extend(i+1, size-1, mask | (1 << free[i]))
+    return extend(0, size, 0)
+
+_builder = {}
+
+def _init_builder(offsets):
+    """Sets up a worker process of :func:`build_tablebase` with the offsets of the material classes."""
+    _builder["offsets"] = offsets
+
+def _class_successors(material):
+    """
+    Generates the successors of every position of a material class, in a worker process.
+    A successor where the player who just moved took the last piece of the other player is given as -1.
+
+    Returns:
+        (array, array): The start of each index's successors, with -1 for indices that hold no position,
+        and the successors' global indices.
+    """
+    offsets = _builder["offsets"]
+    size = get_class_size(material)
+    children = [None]*size
+    board = bitboard_state.BitBoard()
+    for (player1, player2, kings) in _iter_positions(material):
+        for player_turn in (False, True):
+            board.set_position(player1, player2, kings, player_turn)
+            successors = []
+            for move in board.generate_moves():
+                board.apply_move(move)
+                (child1, child2, child_kings) = (board.get_player1_mask(), board.get_player2_mask(),
+                                                 board.get_kings_mask())
+                if child1 and child2:
+                    child = get_material(child1, child2, child_kings)
+                    successors.append(offsets[child] +
+                                      get_index(child, child1, child2, child_kings, not player_turn))
+                else:
+                    successors.append(-1)
+                board.set_position(player1, player2, kings, player_turn)
+            children[get_index(material, player1, player2, kings, player_turn)] = successors
+    starts = array.array("q", [0]*(size+1))
+    flat = array.array("q")
+    for (index, successors) in enumerate(children):
+        if successors is None:
+            starts[index] = -1
+        else:
+            starts[index] = len(flat)
+            flat.extend(successors)
+    starts[size] = len(flat)
+    return (starts, flat)
+
+def build_tablebase(max_pieces=3, workers=None, path=None):
+    """
+    Builds the tablebase of every position with up to the given number of pieces, by retrograde analysis.
+
+    The successors of each material class are generated in parallel by a pool of worker processes.
+    The results are then resolved one ply at a time, starting from the positions where the side to move
+    has no move left: a position with a lost successor is won one ply further, and a position whose
+    successors are all won is lost one ply further. Positions never resolved are draws.
+
+    Args:
+        max_pieces (Optional[int]): The largest number of pieces.
+        workers (Optional[int]): The number of worker processes, the number of CPUs by default. 1 builds serially.
+        path (Optional[str]): The file to save the tablebase to, see :meth:`Tablebase.save`.
+
+    Returns:
+        Tablebase: The tablebase.
+    """
+    classes = get_classes(max_pieces)
+    offsets = {}
+    total = 0
+    for material in classes:
+        offsets[material] = total
+        total += get_class_size(material)
+
+    workers = os.cpu_count() if workers is None else workers
+    if workers > 1:
+        with multiprocessing.Pool(workers, _init_builder, (offsets,)) as pool:
+            results = pool.map(_class_successors, classes)
+    else:
+        _init_builder(offsets)
+        results = [_class_successors(material) for material in classes]
+
+    # Join the classes' successors, and count the predecessors of each index
+    starts = array.array("q", [-1])*(total+1)
+    flat = array.array("q")
+    num_preds = array.array("q", [0])*(total+1)
+    for (material, (class_starts, class_flat)) in zip(classes, results):
+        (offset, base) = (offsets[material], len(flat))
+        for index in range(len(class_starts) - 1):
+            if class_starts[index] >= 0:
+                starts[offset + index] = base + class_starts[index]
+        flat.extend(class_flat)
+        for child in class_flat:
+            if child >= 0:
+                num_preds[child+1] += 1
+    starts[total] = len(flat)
+
+    # The predecessors of index i are preds[pred_starts[i]:pred_starts[i+1]]
+    pred_starts = num_preds
+    for i in range(1, total+1):
+        pred_starts[i] += pred_starts[i-1]
+    fill = array.array("q", pred_starts)
+    preds = array.array("q", [0])*len(flat)
+    results = bytearray(total)
+    remaining = array.array("i", [0])*total
+    frontier = []
+    wins = []
+    end = len(flat)
+    for i in range(total-1, -1, -1):
+        start = starts[i]
+        if start < 0:
+            continue
+        for child in flat[start:end]:
+            if child >= 0:
+                preds[fill[child]] = i
+                fill[child] += 1
+        remaining[i] = end - start
+        if start == end:
+            results[i] = 2
+            frontier.append(i)
+        elif -1 in flat[start:end]:
+            results[i] = 3
+            wins.append(i)
+        end = start
+
+    plies = 0
+    while frontier or wins:
+        next_frontier = wins
+        wins = []
+        code = min(plies+3, MAX_PLIES+2 - (plies & 1))
+        for child in frontier:
+            lost = results[child] % 2 == 0
+            for pred in preds[pred_starts[child]:pred_starts[child+1]]:
+                if results[pred]:
+                    continue
+                if lost:
+                    results[pred] = code
+                    next_frontier.append(pred)
+                else:
+                    remaining[pred] -= 1
+                    if not remaining[pred]:
+                        results[pred] = code
+                        next_frontier.append(pred)
+        frontier = next_frontier
+        plies += 1
+
+    for i in range(total):
+        if starts[i] >= 0 and not results[i]:
+            results[i] = DRAW
+    tablebase = Tablebase(max_pieces=max_pieces, classes=classes, data=bytes(results))
+    if path is not None:
+        tablebase.save(path)
+    return tablebase
+
+class Tablebase:
+    """An endgame tablebase class. Gives the result of positions with few pieces without searching them.
+
+    Args:
+        path (Optional[str]): The file to load the tablebase from, written by :meth:`save`.
+        max_pieces (Optional[int]): The largest number of pieces, when no file is given.
+        classes (Optional[List[(int, int, int, int)]]): The material classes, in the order of the data.
+        data (Optional[bytes]): The stored value of every index, see :mod:`endgame_tablebase`.
+
+    .. note:: Build the tablebase with :func:`build_tablebase`.
+
+    """
+
+    def __init__(self, path=None, max_pieces=0, classes=(), data=b""):
+        if path is not None:
+            with open(path, "rb") as file:
+                contents = file.read()
+            (magic, version, max_pieces, num_classes) = HEADER.unpack_from(contents)
+            if magic != MAGIC or version != VERSION:
+                raise search_engine.AIError("Not a tablebase file: "+str(path))
+            start = HEADER.size + num_classes*CLASS_HEADER.size
+            self.__offsets = {}
+            for i in range(num_classes):
+                (men1, kings1, men2, kings2, offset) = CLASS_HEADER.unpack_from(contents, HEADER.size + i*CLASS_HEADER.size)
+                self.__offsets[(men1, kings1, men2, kings2)] = offset
+            data = contents[start:]
+        else:
+            self.__offsets = {}
+            offset = 0
+            for material in classes:
+                self.__offsets[material] = offset
+                offset += get_class_size(material)
+        self.__max_pieces = max_pieces
+        self.__data = data
+
+    def get_max_pieces(self):
+        """
+        Gets the largest number of pieces of the positions in the tablebase.
+
+        Returns:
+            int: The largest number of pieces.
+        """
+        return self.__max_pieces
+
+    def get_size(self):
+        """
+        Gets the number of indices in the tablebase, which is also its size in bytes.
+
+        Returns:
+            int: The number of indices.
+        """
+        return len(self.__data)
+
+    def probe(self, state):
+        """
+        Looks up the result of a state.
+
+        Args:
+            state (TwoPlayerGameState): A :class:`.BitboardState` or a :class:`.CheckersState`.
+
+        Returns:
+            (int, int): 1 if the side to move wins, -1 if it loses, 0 for a draw, and the number of plies
+            to the end of the game (0 for a draw). None if the state is not in the tablebase.
+        """
+        (player1, player2, kings) = get_square_masks(state)
+        return self.probe_masks(player1, player2, kings, state.get_max_turn())
+
+    def probe_masks(self, player1, player2, kings, player_turn):
+        """
+        Looks up the result of a position, see :meth:`probe`.
+
+        Args:
+            player1 (int): The mask of player 1's pieces, see :class:`.BitBoard`.
+            player2 (int): The mask of player 2's pieces.
+            kings (int): The mask of kings.
+            player_turn (bool): True if it's Player 1's turn, False otherwise.
+
+        Returns:
+            (int, int): The result for the side to move and the number of plies. None if not in the tablebase.
+        """
+        material = get_material(player1, player2, kings)
+        offset = self.__offsets.get(material)
+        if offset is None:
+            return None
+        code = self.__data[offset + get_index(material, player1, player2, kings, player_turn)]
+        if code == INVALID:
+            return None
+        elif code == DRAW:
+            return (0, 0)
+        plies = code - 2
+        return (1 if plies % 2 else -1, plies)
+
+    def save(self, path):
+        """
+        Writes the tablebase to a file: a header, the material class table, then one byte per index.
+
+        Args:
+            path (str): The file to write.
+        """
+        classes = sorted(self.__offsets.items(), key=lambda item: item[1])
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.__max_pieces, len(classes)))
+            for (material, offset) in classes:
+                file.write(CLASS_HEADER.pack(*material, offset))
+            file.write(self.__data)
+
+if __name__ == "__main__":
+    max_pieces = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    path = sys.argv[2] if len(sys.argv) > 2 else "tablebase.bin"
+    start = time.time()
+    tablebase = build_tablebase(max_pieces, path=path)
+    print("Built "+str(tablebase.get_size())+" positions in "+"{0:.3f} seconds".format(time.time()-start))
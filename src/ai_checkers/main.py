@@ -9,6 +9,8 @@ Example:
 
 import search_engine
 import checkers_state
+import bitboard_state
+import endgame_tablebase
 import ai_config
 import sys
 
@@ -21,18 +23,30 @@ def play_game():
     print("2 - Human vs. AI")
     print("3 - Human vs. Human")
     user_input = input()
+    tablebase = None
+    if ai_config.Config.TABLEBASE is not None:
+        tablebase = endgame_tablebase.Tablebase(ai_config.Config.TABLEBASE)
     if user_input == '1':
-        controller1 = search_engine.AIController(mode=ai_config.Config.P1_ALG,max_depth=ai_config.Config.P1_DEPTH)
-        controller2 = search_engine.AIController(mode=ai_config.Config.P2_ALG,max_depth=ai_config.Config.P2_DEPTH)
+        controller1 = search_engine.AIController(mode=ai_config.Config.P1_ALG,max_depth=ai_config.Config.P1_DEPTH,
+                                                 time_limit=ai_config.Config.P1_TIME,node_limit=ai_config.Config.NODE_LIMIT,
+                                                 tablebase=tablebase)
+        controller2 = search_engine.AIController(mode=ai_config.Config.P2_ALG,max_depth=ai_config.Config.P2_DEPTH,
+                                                 time_limit=ai_config.Config.P2_TIME,node_limit=ai_config.Config.NODE_LIMIT,
+                                                 tablebase=tablebase)
     elif user_input == '2':
         controller1 = search_engine.HumanController()
-        controller2 = search_engine.AIController(mode=ai_config.Config.P2_ALG,max_depth=ai_config.Config.P2_DEPTH)
+        controller2 = search_engine.AIController(mode=ai_config.Config.P2_ALG,max_depth=ai_config.Config.P2_DEPTH,
+                                                 time_limit=ai_config.Config.P2_TIME,node_limit=ai_config.Config.NODE_LIMIT,
+                                                 ponder=ai_config.Config.PONDER,tablebase=tablebase)
     else:
         controller1 = search_engine.HumanController()
         controller2 = search_engine.HumanController()
     
-    board=checkers_state.Board(controller1, controller2)
-    state = checkers_state.CheckersState(board=board)
+    if ai_config.Config.BITBOARD:
+        state = bitboard_state.BitboardState(controller1=controller1, controller2=controller2)
+    else:
+        board=checkers_state.Board(controller1, controller2)
+        state = checkers_state.CheckersState(board=board)
     
     state.get_board().print_board()
     
@@ -42,11 +56,13 @@ def play_game():
         state = current_controller.play_move(state)
         if state is None:
             print("Quitting...")
+            stop_pondering(controller1, controller2)
             return
         print(str(current_controller) + ": " + state.get_action())
         state.get_board().print_board()
         current_controller = controller1 if state.get_max_turn() else controller2
         #print("Nodes explored: "+str(engine.get_num_explored()))
+    stop_pondering(controller1, controller2)
     winner = state.get_winner()
     # Game is over
     print((str(winner) + " wins!") if winner else "It's a Tie!")
@@ -55,6 +71,18 @@ def play_game():
         print("Average Time: ".ljust(25)+"{0:.3f}".format(controller1.average_time))
         print("Average Nodes Explored: ".ljust(25)+"{0:.3f}".format(controller1.average_nodes))
         print("Number of Moves: ".ljust(25)+str(controller1.moves))
+        print("Reused/Fresh Nodes: ".ljust(25)+str(controller1.reused_nodes)+"/"+str(controller1.fresh_nodes))
+    if ai_config.Config.PONDER and controller2.get_is_ai():
+        (hits, misses) = controller2.get_engine().get_ponder_stats()
+        print("Ponder Hits: ".ljust(25)+str(hits)+" of "+str(hits+misses))
+
+def stop_pondering(*controllers):
+    """
+    Stops the AI controllers' background searches at the end of the game.
+    """
+    for controller in controllers:
+        if controller.get_is_ai():
+            controller.get_engine().stopPondering()
 
 if __name__ == '__main__':
     args = dict([tuple(arg.split('=')) for arg in sys.argv[1:]])
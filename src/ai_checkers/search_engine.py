@@ -2,7 +2,16 @@
 """
 
 import ai_config
+import array
+import concurrent.futures
+import multiprocessing
+import multiprocessing.shared_memory
+import os
+import struct
+import threading
 import time
+import warnings
+import weakref
 
 class SearchEngine:
     """The search engine class. Used to perform searches on states.
@@ -10,241 +19,1995 @@ class SearchEngine:
     Args:
         state (Optional[TwoPlayerGameState]): The state to start with.
         max_depth (Optional[int]): The maximum depth to search.
-        mode (Optional[str]): The algorithm to use. "MiniMax" for MiniMax algorithm and "AlphaBeta" for AlphaBeta algorithm.
+        mode (Optional[str]): The algorithm to use. "MiniMax" for MiniMax algorithm, "AlphaBeta" for AlphaBeta algorithm 
+            "PVS" for Principal Variation Search and "MTDf" for MTD(f).
+        table (Optional[TranspositionTable]): The transposition table to use. A new one is made by default.
+        time_limit (Optional[float]): The time budget per move, in seconds.
+        node_limit (Optional[int]): The node budget per move.
+        workers (Optional[int]): The number of processes searching, :attr:`.Config.WORKERS` by default.
+        parallel (Optional[str]): How the workers search, "root" to split the root moves, "smp" for Lazy SMP 
+            or "ybw" for Young Brothers Wait, :attr:`.Config.PARALLEL` by default.
+        tablebase (Optional[Tablebase]): The endgame tablebase to probe, see :mod:`endgame_tablebase`. None by default.
     
     .. note:: The setting :attr:`.Config.avoid_stalemate` option allows for stale-mates to become unfavorable.
     
+    .. note:: Below the root, the search walks a single state in place with :meth:`TwoPlayerGameState.make_move` 
+        and :meth:`TwoPlayerGameState.unmake_move`, so no successor states are built.
+    
+    .. note:: Results are kept in the :class:`TranspositionTable` between searches, 
+        so positions already searched on earlier moves of the game are not searched again.
+    
+    .. note:: With more than one worker, the root moves are searched in parallel, see :meth:`startParallel`,
+        or every worker runs the whole search on a shared table, see :meth:`startLazySMP`,
+        or the moves of interior nodes are searched in parallel, see :meth:`startYBW`.
+    
+    .. note:: When a time or node budget is given, the engine deepens iteratively (depth 1, 2, 3... up to max_depth) 
+        until the budget runs out, see :meth:`startIterativeDeepening`.
+    
+    .. note:: The engine can search the opponent's replies while the opponent thinks, see :meth:`startPondering`.
+    
+    .. note:: With a tablebase, the positions with few enough pieces are looked up instead of searched, 
+        see :meth:`alphaBeta`.
+    
     """
     
-    def __init__(self,state=None,mode="AlphaBeta",max_depth=5):
+    KILLER_SCORE = 1 << 40 #: int: The ordering score of a killer move, above any history score.
+    NULL_WINDOW = 1e-9 #: float: The width of the null windows searched in "PVS" mode, below any difference in utility.
+    TABLEBASE_PLY = 1e-4 #: float: How much a tablebase win is worth less for each ply it takes, so that quicker wins are preferred.
+    
+    def __init__(self,state=None,mode="AlphaBeta",max_depth=5,table=None,time_limit=None,node_limit=None,
+                 workers=None,parallel=None,tablebase=None):
         self.__state = state
         self.__max_depth = max_depth
         self.__mode = mode
-        self.__explored = dict()
+        self.__workers = ai_config.Config.WORKERS if workers is None else workers
+        if table is None:
+            if self.__workers > 1 and (ai_config.Config.PARALLEL if parallel is None else parallel) in ("smp", "ybw"):
+                table = SharedTranspositionTable(ai_config.Config.TT_MB, ai_config.Config.TT_REPLACEMENT)
+            else:
+                table = TranspositionTable(ai_config.Config.TT_MB, ai_config.Config.TT_REPLACEMENT)
+        self.__table = table
+        self.__time_limit = time_limit
+        self.__node_limit = node_limit
+        self.__worker_nodes = {}
+        self.__cpu_usage = 1.0
+        self.__parallel = ai_config.Config.PARALLEL if parallel is None else parallel
+        self.__tablebase = tablebase
+        self.__tablebase_probes = 0
+        self.__tablebase_hits = 0
+        self.__deadline = None
+        self.__stop = None
+        self.__pool = None
+        self.__split_token = None
+        self.__split_bound = None
+        self.__splits = 0
+        self.__abort = None
+        self.__ponder_thread = None
+        self.__ponder_stop = None
+        self.__pondered = None
+        self.__ponder_hits = 0
+        self.__ponder_misses = 0
+        self.__depth_times = []
+        self.__limited = False
+        self.__pv = []
+        self.__on_pv = False
+        self.__depth_reached = 0
+        self.__utility = None
+        self.__passes = []
+        self.__aspiration_searches = 0
+        self.__fail_highs = 0
+        self.__fail_lows = 0
+        self.__killers = []
+        self.__history = {}
         self.__time_elapsed = 0
-#         if state:
-#             self.__explored[state.get_hashable_state()] = state
         self.__num_explored = 0
+        self.__num_quiescence = 0
         
     def getNextState(self):
         """
-        Uses the set algorithm to find the most preferable next state.
+        Uses the set algorithm to find the most preferable next state.
+        
+        Returns:
+            TwoPlayerGameState: The next state to be played.
+        """
+        can_fork = "fork" in multiprocessing.get_all_start_methods()
+        self.stopPondering()
+        root = self.__state
+        pondered = self.__find_pondered()
+        if pondered is not None:
+            next_state = self.__playPondered(pondered)
+        elif self.__workers > 1 and self.__parallel == "smp" and can_fork:
+            next_state = self.startLazySMP()
+        elif self.__time_limit is not None or self.__node_limit is not None:
+            if self.__workers > 1 and self.__parallel == "root":
+                warnings.warn("The root-parallel search has no time or node budget, searching serially", RuntimeWarning)
+            elif self.__workers > 1 and self.__parallel == "ybw":
+                warnings.warn("The Young Brothers Wait search has no time or node budget, searching serially", 
+                              RuntimeWarning)
+            next_state = self.startIterativeDeepening()
+        elif self.__workers > 1 and self.__parallel == "ybw" and can_fork:
+            next_state = self.startYBW()
+        elif self.__workers > 1 and self.__parallel == "root" and self.__mode != "MTDf" and can_fork:
+            next_state = self.startParallel()
+        elif self.__mode == "MiniMax":
+            next_state = self.startMiniMax()
+        elif self.__mode == "MTDf":
+            next_state = self.startMTDf()
+        else:
+            next_state = self.startAlphaBeta()
+        # The searched state's caches are no longer needed, and would keep its other successors alive
+        root.release_successors()
+        self.__state = next_state
+        return next_state
+    
+    def set_state(self,state):
+        """
+        Sets the state of the search engine. Stops pondering, see :meth:`startPondering`.
+        
+        Args:
+            state (TwoPlayerGameState): The state to be set.
+        """
+        self.stopPondering()
+        self.__state = state
+    
+    def get_table(self):
+        """
+        Gets the transposition table used by the search engine.
+        
+        Returns:
+            TranspositionTable: The transposition table.
+        """
+        return self.__table
+    
+    def get_num_explored(self):
+        """
+        Gets the number of explored nodes from the last run.
+        
+        Returns:
+            int: The number of explored nodes
+        """
+        return self.__num_explored
+    
+    def get_num_quiescence(self):
+        """
+        Gets the number of nodes explored past the search horizon by :meth:`quiescence` in the last run.
+        These are not part of :meth:`get_num_explored`.
+        
+        Returns:
+            int: The number of quiescence nodes
+        """
+        return self.__num_quiescence
+    
+    def get_time_elapsed(self):
+        """
+        Gets the time elapsed for the last run.
+        
+        Returns:
+            float: The time elapsed, in seconds
+        """
+        return self.__time_elapsed
+    
+    def get_utility(self):
+        """
+        Gets the utility value of the move chosen by the last run.
+        
+        Returns:
+            float: The utility value, including the penalty for repeated positions. None before the first run.
+        """
+        return self.__utility
+    
+    def get_aspiration_stats(self):
+        """
+        Gets the statistics of the aspiration windows of every run so far.
+        A root search that falls outside its window is searched again with a wider one.
+        
+        Returns:
+            dict: The number of windowed root searches, of fail-highs and fail-lows, and the rate of re-searches.
+        """
+        searches = max(self.__aspiration_searches, 1)
+        return {"searches": self.__aspiration_searches, "fail_highs": self.__fail_highs, 
+                "fail_lows": self.__fail_lows, 
+                "research_rate": (self.__fail_highs + self.__fail_lows)/searches}
+    
+    def get_mtdf_passes(self):
+        """
+        Gets the zero-window passes of the last MTD(f) search.
+        
+        Returns:
+            List[(float, float, int)]: The beta, the fail-soft result and the number of nodes explored of each pass.
+        """
+        return list(self.__passes)
+    
+    def get_worker_nodes(self):
+        """
+        Gets the number of nodes explored by each worker process in the last parallel run.
+        
+        Returns:
+            dict: The number of explored nodes, by worker process id.
+        """
+        return dict(self.__worker_nodes)
+    
+    def get_cpu_usage(self):
+        """
+        Gets the processor usage of the last root-parallel run: the processor time spent searching by all 
+        the workers, over the time elapsed. This is how busy the workers kept the processors, 
+        not the speedup over a serial search, which :func:`benchmarks.compare_parallel` measures.
+        
+        Returns:
+            float: The processor usage. 1.0 for a serial run.
+        """
+        return self.__cpu_usage
+    
+    def get_depth_times(self):
+        """
+        Gets the time taken to complete each depth by the last iterative deepening run,
+        by the main worker for :meth:`startLazySMP`.
+        
+        Returns:
+            List[(int, float)]: The depths completed, with the time since the start of the search in seconds.
+        """
+        return list(self.__depth_times)
+    
+    def get_depth_reached(self):
+        """
+        Gets the depth of the last completed search.
+        
+        Returns:
+            int: The depth. For iterative deepening, the depth of the last completed iteration.
+        """
+        return self.__depth_reached
+    
+    def get_reuse_stats(self):
+        """
+        Gets how much of the last search was reused from earlier searches of the game, whose results 
+        are kept in the transposition table.
+        
+        Returns:
+            (int, int): The number of nodes that reused an earlier search's result, to order their moves 
+            or without being searched, and the number of nodes freshly expanded, without one. 
+            Together, they are the nodes explored.
+        """
+        reused = self.__table.get_stats()["reused"]
+        return (reused, self.__num_explored - reused)
+    
+    def get_tablebase_stats(self):
+        """
+        Gets the number of endgame tablebase probes of the last search, see :meth:`alphaBeta`. 
+        Probes made by worker processes are not counted.
+        
+        Returns:
+            (int, int): The number of probes, and of probes that found the position.
+        """
+        return (self.__tablebase_probes, self.__tablebase_hits)
+    
+    def get_ponder_stats(self):
+        """
+        Gets the number of searches answered from pondering, see :meth:`startPondering`.
+        
+        Returns:
+            (int, int): The number of ponder hits, and of ponder misses.
+        """
+        return (self.__ponder_hits, self.__ponder_misses)
+    
+    def get_principal_variation(self):
+        """
+        Gets the principal variation of the last search, as found in the transposition table.
+        
+        Returns:
+            List[int]: The keys of the expected moves, starting with the move chosen.
+        """
+        return list(self.__pv)
+    
+    def startMiniMax(self):
+        """
+        Entry point for the MiniMax algorithm.
+        Gives the most preferable next state.
+        
+        Returns:
+            TwoPlayerGameState: The next state to be played.
+        """
+        start = time.time()
+        self.__new_search()
+        
+        choice = self.__rootMiniMax(self.__state.get_moves())
+        self.__depth_reached = self.__max_depth
+                
+        end = time.time()
+        
+        self.__time_elapsed = end-start
+        
+        self.__utility = choice[1]
+        self.__print_metrics(choice[1])
+        
+        return self.__state.get_successor(choice[0])
+        
+    def startAlphaBeta(self):
+        """
+        Entry point for the AlphaBeta pruning algorithm, and for Principal Variation Search in "PVS" mode.
+        Gives the most preferable next state.
+        
+        Returns:
+            TwoPlayerGameState: The next state to be played.
+        """
+        start = time.time()
+        self.__new_search()
+        
+        choice = self.__rootAspiration(self.__state.get_moves(), self.__utility)
+        self.__depth_reached = self.__max_depth
+        
+        end = time.time()
+        
+        self.__time_elapsed = end-start
+        
+        self.__utility = choice[1]
+        self.__print_metrics(choice[1])
+        
+        return self.__state.get_successor(choice[0])
+    
+    def startMTDf(self):
+        """
+        Entry point for the MTD(f) algorithm.
+        Gives the most preferable next state.
+        
+        MTD(f) finds the utility value with a series of zero-window AlphaBeta passes, each one proving 
+        the value above or below a guess. The first guess is the value found on the engine's previous move, 
+        and the bounds proved by every pass are kept in the transposition table for the next ones.
+        
+        Returns:
+            TwoPlayerGameState: The next state to be played.
+        """
+        start = time.time()
+        self.__new_search()
+        
+        choice = self.__rootMTDf(self.__state.get_moves(), self.__utility or 0)
+        self.__depth_reached = self.__max_depth
+        
+        end = time.time()
+        
+        self.__time_elapsed = end-start
+        
+        self.__utility = choice[1]
+        self.__print_metrics(choice[1])
+        for (i, (beta, value, nodes)) in enumerate(self.__passes):
+            print("Pass "+str(i+1)+": "+("above " if value >= beta else "below ")+"{0:.3f}".format(beta)+
+                  " ({0:.3f}), ".format(value)+str(nodes)+" nodes")
+        
+        return self.__state.get_successor(choice[0])
+    
+    def startParallel(self):
+        """
+        Entry point for the root-parallel search, with the MiniMax, AlphaBeta or PVS algorithm.
+        Gives the most preferable next state.
+        
+        The root moves are searched by a pool of processes, forked from this one so that the state is not copied 
+        through pickling. Workers share the best value found so far, and the index of its move, so that the moves 
+        searched later get a tighter window. A move before the current best is searched just below that value and a 
+        move after it at that value: a move is only proved better when the serial search would choose it too, 
+        so the move chosen is the serial search's choice.
+        
+        Each worker searches on a new transposition table, without the aspiration window or the utility 
+        found on earlier moves, so the choice is that of a newly created serial engine. An engine that kept its 
+        table from earlier moves may choose another move of the same value.
+        
+        The root-parallel search has no time or node budget: with either, the engine warns and searches serially, 
+        see :meth:`startIterativeDeepening`.
+        
+        Returns:
+            TwoPlayerGameState: The next state to be played.
+        """
+        start = time.time()
+        self.__new_search()
+        self.__worker_nodes = {}
+        
+        state = self.__state
+        moves = state.get_moves()
+        is_max_turn = state.get_max_turn()
+        
+        choice = (None,float("-inf")) if is_max_turn else (None,float("inf"))
+        search_time = 0
+        if(len(moves) == 1):
+            undo = state.make_move(moves[0])
+            choice = (moves[0],state.get_utility_value())
+            state.unmake_move(undo)
+        else:
+            context = multiprocessing.get_context("fork")
+            bound = context.Array("d", [choice[1], len(moves)])
+            with concurrent.futures.ProcessPoolExecutor(min(self.__workers, len(moves)), context, _init_root_worker, 
+                                                        (state, self.__mode, self.__max_depth, bound, self.__tablebase)) as executor:
+                results = list(executor.map(_search_root_move, range(len(moves))))
+            # The results are in move order, so ties go to the first move like in the serial search
+            for (index, val, exact, nodes, worker, elapsed) in results:
+                self.__num_explored += nodes
+                self.__worker_nodes[worker] = self.__worker_nodes.get(worker, 0) + nodes
+                search_time += elapsed
+                if exact and (val > choice[1] if is_max_turn else val < choice[1]):
+                    choice = (moves[index],val)
+        self.__depth_reached = self.__max_depth
+        
+        end = time.time()
+        
+        self.__time_elapsed = end-start
+        self.__cpu_usage = search_time/self.__time_elapsed if search_time else 1.0
+        
+        self.__utility = choice[1]
+        self.__print_metrics(choice[1])
+        for (worker, nodes) in sorted(self.__worker_nodes.items()):
+            print("Worker "+str(worker)+": "+str(nodes)+" nodes")
+        print("CPU Usage: "+"{0:.2f}".format(self.__cpu_usage))
+        
+        return state.get_successor(choice[0])
+    
+    def searchRootMove(self, index, bound):
+        """Searches one root move for :meth:`startParallel`, in a worker process.
+        
+        Args:
+            index (int): The index of the move in the state's moves.
+            bound (multiprocessing.Array): The shared best value and index of its move, updated when the move beats them.
+            
+        Returns:
+            (int, float, bool, int, int, float): The index, the value, whether the value is exact rather than a bound, 
+            the number of nodes explored, the worker's process id and the processor time spent.
+        """
+        start = time.process_time()
+        self.__num_explored = 0
+        state = self.__state
+        is_max_turn = state.get_max_turn()
+        undo = state.make_move(state.get_moves()[index])
+        try:
+            if self.__mode == "MiniMax":
+                val = self.miniMax(state)
+                if ai_config.Config.AVOID_TIE and state.check_path():
+                        val = val + (-1 - val)/2
+                exact = True
+            else:
+                with bound.get_lock():
+                    (best, best_index) = (bound[0], bound[1])
+                # A move before the best one also wins a tie
+                if is_max_turn:
+                    alpha = best - SearchEngine.NULL_WINDOW if index < best_index else best
+                    val = self.alphaBeta(state,alpha,float("inf"))
+                    exact = val > alpha
+                else:
+                    beta = best + SearchEngine.NULL_WINDOW if index < best_index else best
+                    val = self.alphaBeta(state,float("-inf"),beta)
+                    exact = val < beta
+                if ai_config.Config.AVOID_TIE and state.check_path():
+                    # A repeated position ends the search, so its value is exact
+                    val = val + ((-1 if is_max_turn else 1) - val)/2
+                    exact = True
+                if exact:
+                    with bound.get_lock():
+                        if ((val > bound[0] if is_max_turn else val < bound[0]) or
+                                (val == bound[0] and index < bound[1])):
+                            (bound[0], bound[1]) = (val, index)
+        finally:
+            state.unmake_move(undo)
+        return (index, val, exact, self.__num_explored, os.getpid(), time.process_time()-start)
+    
+    def startIterativeDeepening(self):
+        """
+        Entry point for iterative deepening.
+        Searches to depth 1, 2, 3... with the set algorithm until the time or node budget runs out,
+        or max_depth is reached. Each iteration searches the previous iteration's principal variation first.
+        
+        Returns:
+            TwoPlayerGameState: The best next state found by the last completed iteration.
+        """
+        start = time.time()
+        self.__new_search()
+        
+        state = self.__state
+        self.__deadline = start + self.__time_limit if self.__time_limit is not None else None
+        choice = self.__deepen(state.get_moves(), self.__utility)
+        
+        end = time.time()
+        
+        self.__time_elapsed = end-start
+        
+        self.__utility = choice[1]
+        self.__print_metrics(choice[1])
+        print("Depth Reached: "+str(self.__depth_reached))
+        if self.__mode == "MTDf":
+            print("MTD(f) Passes: "+str(len(self.__passes)))
+        
+        return state.get_successor(choice[0])
+    
+    def startLazySMP(self):
+        """
+        Entry point for the Lazy SMP search.
+        Gives the most preferable next state.
+        
+        Every worker process runs the same iterative deepening search (see :meth:`startIterativeDeepening`) 
+        from the state, and all of them share one :class:`SharedTranspositionTable`, so each worker mostly reuses 
+        the others' results. Helper workers vary the search: every other helper starts at depth 2, 
+        and each helper tries the root moves in another order. The search stops as soon as the main worker 
+        finishes, or any worker completes max_depth; the deepest result is played, the main worker's on a tie.
+        
+        Returns:
+            TwoPlayerGameState: The next state to be played.
+        """
+        start = time.time()
+        self.__new_search()
+        self.__worker_nodes = {}
+        
+        state = self.__state
+        moves = state.get_moves()
+        if(len(moves) == 1):
+            undo = state.make_move(moves[0])
+            choice = (moves[0],state.get_utility_value())
+            state.unmake_move(undo)
+            self.__depth_reached = 1
+        else:
+            context = multiprocessing.get_context("fork")
+            stop = context.Value("b", 0, lock=False)
+            with concurrent.futures.ProcessPoolExecutor(self.__workers, context, _init_smp_worker,
+                                                        (state, self.__mode, self.__max_depth, self.__table, 
+                                                         self.__time_limit, self.__node_limit, stop, 
+                                                         self.__tablebase)) as executor:
+                results = list(executor.map(_search_helper, range(self.__workers), [self.__utility]*self.__workers))
+            best = None
+            # The results are in helper order, so the main worker's result wins a tie
+            for (helper, move_key, val, depth, nodes, depth_times, worker) in results:
+                self.__num_explored += nodes
+                self.__worker_nodes[worker] = self.__worker_nodes.get(worker, 0) + nodes
+                if helper == 0:
+                    self.__depth_times = depth_times
+                if move_key is not None and (best is None or depth > best[2]):
+                    best = (move_key, val, depth)
+            choice = (state.decode_move(best[0]), best[1])
+            self.__depth_reached = best[2]
+        
+        end = time.time()
+        
+        self.__time_elapsed = end-start
+        
+        self.__utility = choice[1]
+        self.__print_metrics(choice[1])
+        print("Depth Reached: "+str(self.__depth_reached))
+        for (worker, nodes) in sorted(self.__worker_nodes.items()):
+            print("Worker "+str(worker)+": "+str(nodes)+" nodes")
+        
+        return state.get_successor(choice[0])
+    
+    def startYBW(self):
+        """
+        Entry point for the Young Brothers Wait search.
+        Gives the most preferable next state.
+        
+        The search runs like the serial one, with the set algorithm, but once the first move of an interior node 
+        has been searched, the other moves of the node (its young brothers) are searched by a pool of worker 
+        processes, when at least :attr:`.Config.YBW_DEPTH` moves remain below the node. A cutoff aborts the 
+        workers still searching the node's moves. The best value found among the brothers is shared with the 
+        workers, so that the brothers started later get a tighter window. The positions are sent to the workers 
+        with :meth:`TwoPlayerGameState.encode`. MiniMax searches have no cutoffs, and are searched serially.
+        
+        The Young Brothers Wait search has no time or node budget: with either, :meth:`getNextState` warns 
+        and searches serially, see :meth:`startIterativeDeepening`.
+        
+        Returns:
+            TwoPlayerGameState: The next state to be played.
+        """
+        self.__worker_nodes = {}
+        if self.__mode == "MiniMax":
+            return self.startMiniMax()
+        forked = "fork" in multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if forked else None)
+        self.__split_token = context.Value("i", 0, lock=False)
+        self.__split_bound = context.Value("d", 0.0, lock=False)
+        # Forked workers share the engine's table, when it is a SharedTranspositionTable
+        table = self.__table if forked and isinstance(self.__table, SharedTranspositionTable) else None
+        with concurrent.futures.ProcessPoolExecutor(self.__workers, context, _init_ybw_worker, 
+                                                    (self.__mode, self.__split_token, self.__split_bound, table, 
+                                                     self.__tablebase)) as executor:
+            self.__pool = executor
+            try:
+                if self.__mode == "MTDf":
+                    next_state = self.startMTDf()
+                else:
+                    next_state = self.startAlphaBeta()
+            finally:
+                self.__split_token.value = 0
+                self.__pool = None
+        for (worker, nodes) in sorted(self.__worker_nodes.items()):
+            print("Worker "+str(worker)+": "+str(nodes)+" nodes")
+        return next_state
+    
+    def searchSplit(self, state, alpha, beta, depth, max_depth, token, bound):
+        """Searches a young brother for :meth:`startYBW`, in a worker process.
+        
+        Args:
+            state (TwoPlayerGameState): The state reached by the move.
+            alpha (float): The alpha value of the node.
+            beta (float): The beta value of the node.
+            depth (int): The depth of the state.
+            max_depth (int): The depth searched to.
+            token (int): The split's token. The search is aborted once the shared token has changed.
+            bound (multiprocessing.Value): The best value found so far among the node's moves, 
+                which raises alpha (lowers beta) when the search starts.
+            
+        Returns:
+            (float, int, int): The utility value, the number of nodes explored and the worker's process id, 
+            or None if the search was aborted.
+        """
+        nodes = self.__num_explored + self.__num_quiescence
+        self.__state = state
+        self.__max_depth = max_depth
+        self.__abort = token
+        self.__limited = True
+        try:
+            # The node is the state's predecessor, so it is MAX's turn there when it is not MAX's turn here
+            if state.get_max_turn():
+                beta = min(beta, bound.value)
+            else:
+                alpha = max(alpha, bound.value)
+            if _ybw_worker["token"].value != token or alpha >= beta:
+                # The split was cut off before the move was started
+                return None
+            val = self.alphaBeta(state,alpha,beta,depth)
+        except SearchTimeout:
+            return None
+        finally:
+            self.__abort = None
+            self.__limited = False
+        return (val, self.__num_explored + self.__num_quiescence - nodes, os.getpid())
+    
+    def __split(self, state, moves, alpha, beta, depth):
+        """Searches the young brothers of a node in the worker pool, see :meth:`startYBW`.
+        
+        Returns:
+            (float, object): The best utility value and its move.
+        """
+        is_max_turn = state.get_max_turn()
+        # Every split gets a new token, so workers still searching an earlier split see it change
+        self.__splits = (self.__splits % 0x7FFFFFFF) + 1
+        token = self.__splits
+        self.__split_bound.value = alpha if is_max_turn else beta
+        self.__split_token.value = token
+        futures = {}
+        for move in moves:
+            undo = state.make_move(move)
+            code = state.encode()
+            state.unmake_move(undo)
+            futures[self.__pool.submit(_search_split, type(state), code, alpha, beta, depth+1, 
+                                       self.__max_depth, token)] = move
+        best = (float("-inf"), None) if is_max_turn else (float("inf"), None)
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                if result is None:
+                    continue
+                (val, nodes, worker) = result
+                self.__num_explored += nodes
+                self.__worker_nodes[worker] = self.__worker_nodes.get(worker, 0) + nodes
+                if (val > best[0]) if is_max_turn else (val < best[0]):
+                    best = (val, futures[future])
+                    if (val > self.__split_bound.value) if is_max_turn else (val < self.__split_bound.value):
+                        self.__split_bound.value = val
+                if (best[0] >= beta) if is_max_turn else (best[0] <= alpha):
+                    break
+        finally:
+            # Aborts the brothers still searching, after a cutoff or an abort
+            self.__split_token.value = 0
+            for future in futures:
+                future.cancel()
+        return best
+    
+    def searchHelper(self, helper, stop, expected=None):
+        """Runs one worker of :meth:`startLazySMP`, in a worker process.
+        
+        Args:
+            helper (int): The worker's number, 0 for the main worker.
+            stop (multiprocessing.Value): The flag that stops every worker once set.
+            expected (Optional[float]): The expected utility value, for the aspiration windows.
+            
+        Returns:
+            (int, int, float, int, int, List[(int, float)], int): The worker's number, the key of the best move 
+            (None if no iteration completed), its value, the depth reached, the number of nodes explored, 
+            the time to each depth and the worker's process id.
+        """
+        start = time.time()
+        self.__num_explored = 0
+        self.__num_quiescence = 0
+        self.__pv = []
+        self.__killers = []
+        self.__stop = stop
+        self.__deadline = start + self.__time_limit if self.__time_limit is not None else None
+        
+        moves = self.__state.get_moves()
+        shift = helper % len(moves)
+        choice = self.__deepen(moves[shift:] + moves[:shift], expected, 1 + helper % 2, helper > 0)
+        if helper == 0 or self.__depth_reached == self.__max_depth:
+            stop.value = 1
+        self.__stop = None
+        if choice is None:
+            return (helper, None, None, 0, self.__num_explored, self.__depth_times, os.getpid())
+        return (helper, choice[0].get_key(), choice[1], self.__depth_reached, self.__num_explored, 
+                self.__depth_times, os.getpid())
+    
+    def startPondering(self, state=None):
+        """
+        Starts pondering: searching the opponent's replies to the state in a background thread, 
+        while the opponent thinks. The reply predicted by the principal variation is searched first,
+        then the others. The results are kept in the transposition table, and the best move found 
+        after each reply is remembered.
+        
+        The next call to :meth:`getNextState` stops pondering. If its state was reached by a reply 
+        that was searched to max_depth (a ponder hit), the remembered move is played without searching.
+        
+        Args:
+            state (Optional[TwoPlayerGameState]): The state the opponent plays from, the last state played by default.
+        """
+        self.stopPondering()
+        state = self.__state if state is None else state
+        if state is None or state.is_end_state():
+            return
+        if len(self.__pv) > 1:
+            predicted = self.__pv[1]
+        else:
+            entry = self.__table.peek(state.get_hashable_state())
+            predicted = entry[3] if entry is not None else None
+        self.__pondered = {}
+        self.__ponder_stop = multiprocessing.Value("b", 0, lock=False)
+        self.__ponder_thread = threading.Thread(target=self.ponder, args=(state, self.__ponder_stop, predicted), 
+                                                daemon=True)
+        self.__ponder_thread.start()
+    
+    def stopPondering(self):
+        """
+        Stops pondering, and waits for the background search to finish. Does nothing if the engine isn't pondering.
+        """
+        if self.__ponder_thread is None:
+            return
+        self.__ponder_stop.value = 1
+        self.__ponder_thread.join()
+        self.__ponder_thread = None
+        self.__ponder_stop = None
+    
+    def ponder(self, state, stop, predicted=None):
+        """Searches the replies to the state with iterative deepening, for :meth:`startPondering`.
+        
+        Args:
+            state (TwoPlayerGameState): The state the opponent plays from.
+            stop (multiprocessing.Value): The flag that stops pondering once set.
+            predicted (Optional[int]): The key of the predicted reply, searched first.
+        """
+        if self.__pondered is None:
+            self.__pondered = {}
+        # A sorted copy: the state's own move list may be read by the main thread meanwhile
+        moves = sorted(state.get_moves(), key=lambda move: move.get_key() != predicted)
+        previous = self.__state
+        self.__stop = stop
+        self.__deadline = None
+        try:
+            for move in moves:
+                if stop.value:
+                    break
+                child = state.get_successor(move)
+                child.fork_history()
+                if child.is_end_state():
+                    continue
+                self.__state = child
+                self.__pv = []
+                choice = self.__deepen(child.get_moves(), self.__utility, 1, True)
+                if choice is not None:
+                    self.__pondered[child.get_hashable_state()] = (choice[0].get_key(), choice[1], 
+                                                                   self.__depth_reached, list(self.__pv))
+        finally:
+            self.__stop = None
+            self.__state = previous
+    
+    def __find_pondered(self):
+        """Looks up the state in the results of the last pondering, and counts the ponder hit or miss.
+        
+        Returns:
+            (int, float, int, List[int]): The key of the best move, its utility value, the depth searched 
+            and the principal variation, or None if the state wasn't pondered to max_depth.
+        """
+        if self.__pondered is None:
+            return None
+        pondered = self.__pondered.get(self.__state.get_hashable_state())
+        self.__pondered = None
+        if pondered is None or pondered[2] < self.__max_depth:
+            self.__ponder_misses += 1
+            return None
+        self.__ponder_hits += 1
+        return pondered
+    
+    def __playPondered(self, pondered):
+        """Plays the move found by pondering, see :meth:`startPondering`.
+        
+        Returns:
+            TwoPlayerGameState: The next state to be played.
+        """
+        start = time.time()
+        (key, utility, depth, pv) = pondered
+        state = self.__state
+        self.__num_explored = 0
+        self.__num_quiescence = 0
+        self.__worker_nodes = {}
+        self.__table.reset_stats()
+        self.__utility = utility
+        self.__depth_reached = depth
+        self.__pv = pv
+        next_state = state.get_successor(state.decode_move(key))
+        self.__time_elapsed = time.time()-start
+        self.__print_metrics(utility)
+        print("Ponder Hit: "+str(self.__ponder_hits)+" of "+str(self.__ponder_hits+self.__ponder_misses))
+        return next_state
+    
+    def __deepen(self, moves, expected, first_depth=1, always_limited=False):
+        """The iterative deepening loop of :meth:`startIterativeDeepening` and :meth:`searchHelper`.
+        
+        Returns:
+            (object, float): The best move and its utility value from the last completed iteration, 
+            or None if no iteration completed.
+        """
+        state = self.__state
+        max_depth = self.__max_depth
+        start = time.time()
+        self.__depth_reached = 0
+        self.__depth_times = []
+        choice = None
+        try:
+            for depth in range(min(first_depth, max_depth), max_depth+1):
+                self.__max_depth = depth
+                # The first iteration always completes, so that there is a move to play
+                self.__limited = always_limited or choice is not None
+                if self.__mode == "MiniMax":
+                    choice = self.__rootMiniMax(moves)
+                elif self.__mode == "MTDf":
+                    choice = self.__rootMTDf(moves, (expected or 0) if choice is None else choice[1])
+                else:
+                    choice = self.__rootAspiration(moves, expected if choice is None else choice[1])
+                self.__depth_reached = depth
+                self.__depth_times.append((depth, time.time()-start))
+                self.__pv = self.__find_pv(state, choice[0], depth)
+                if len(moves) == 1 or (self.__deadline is not None and time.time() >= self.__deadline):
+                    break
+        except SearchTimeout:
+            pass
+        finally:
+            self.__max_depth = max_depth
+            self.__limited = False
+            self.__on_pv = False
+        return choice
+    
+    def __print_metrics(self, utility):
+        print("Utility: "+"{0:.3f}".format(utility))
+        print("Nodes Explored: "+str(self.__num_explored))
+        print("Quiescence Nodes: "+str(self.__num_quiescence))
+        print("Time Elapsed: "+"{0:.3f} seconds".format(self.__time_elapsed))
+        print(self.__table.get_stats_string())
+        print("Reused Nodes: "+str(self.__table.get_stats()["reused"]))
+        if self.__tablebase is not None:
+            print("Tablebase Hits: "+str(self.__tablebase_hits)+" of "+str(self.__tablebase_probes)+" probes")
+        if self.__aspiration_searches:
+            print("Aspiration Fail-Highs: "+str(self.__fail_highs)+" Fail-Lows: "+str(self.__fail_lows))
+    
+    def __rootMiniMax(self, moves):
+        """Searches the root moves with MiniMax.
+        
+        Returns:
+            (object, float): The best move and its utility value.
+        """
+        state = self.__state
+        is_max_turn = state.get_max_turn()
+        
+        if is_max_turn:
+            choice = (None,float("-inf"))
+        else:
+            choice = (None,float("inf"))
+        
+        if(len(moves) == 1):
+            undo = state.make_move(moves[0])
+            choice = (moves[0],state.get_utility_value())
+            state.unmake_move(undo)
+        else:
+            for move in moves:
+                undo = state.make_move(move)
+                try:
+                    val = self.miniMax(state)
+                    if ai_config.Config.AVOID_TIE and state.check_path():
+                            val = val + (-1 - val)/2
+                finally:
+                    state.unmake_move(undo)
+                if is_max_turn:
+                    if val > choice[1]:
+                        choice = (move,val)
+                else:
+                    if val < choice[1]:
+                        choice = (move,val)
+        return choice
+    
+    def __rootAlphaBeta(self, moves, alpha=float("-inf"), beta=float("inf")):
+        """Searches the root moves with AlphaBeta pruning, starting with the principal variation, if any.
+        
+        Returns:
+            (object, float): The best move and its utility value. The value is fail-soft, 
+            like the value of :meth:`alphaBeta`.
+        """
+        state = self.__state
+        is_max_turn = state.get_max_turn()
+        
+        choice = (None,float("-inf")) if is_max_turn else (None,float("inf"))
+        
+        if(len(moves) == 1):
+            undo = state.make_move(moves[0])
+            choice = (moves[0],state.get_utility_value())
+            state.unmake_move(undo)
+            return choice
+        
+        if self.__pv:
+            pv_move = state.decode_move(self.__pv[0])
+            moves = [pv_move] + [move for move in moves if move != pv_move]
+            self.__on_pv = True
+        
+        null_window = self.__mode == "PVS"
+        for move in moves:
+            undo = state.make_move(move)
+            try:
+                if null_window and choice[0] is not None:
+                    # Only a better move needs an exact value, the repetition penalty never makes a move better
+                    if is_max_turn:
+                        val = self.alphaBeta(state,alpha,alpha+SearchEngine.NULL_WINDOW)
+                        if val > alpha:
+                            val = self.alphaBeta(state,alpha,beta)
+                    else:
+                        val = self.alphaBeta(state,beta-SearchEngine.NULL_WINDOW,beta)
+                        if val < beta:
+                            val = self.alphaBeta(state,alpha,beta)
+                else:
+                    val = self.alphaBeta(state,alpha,beta)
+                is_repeat = ai_config.Config.AVOID_TIE and state.check_path()
+            finally:
+                state.unmake_move(undo)
+            self.__on_pv = False
+            if is_max_turn:
+                if is_repeat:
+                    val = val + (-1 - val)/2
+                if val > choice[1]:
+                    choice = (move,val)
+                    alpha = max(alpha, val)
+            else:
+                if is_repeat:
+                    val = val + (1 - val)/2
+                if val < choice[1]:
+                    choice = (move,val)
+                    beta = min(beta, val)                
+        return choice
+    
+    def __rootAspiration(self, moves, expected):
+        """Searches the root moves with AlphaBeta pruning, within a window around the expected utility value.
+        
+        The window starts :attr:`.Config.ASPIRATION_WINDOW` wide on each side. When the value falls outside it,
+        that side is widened, twice as much each time, and the root is searched again.
+        
+        Returns:
+            (object, float): The best move and its utility value.
+        """
+        delta = ai_config.Config.ASPIRATION_WINDOW
+        if expected is None or not delta or len(moves) == 1:
+            return self.__rootAlphaBeta(moves)
+        (alpha, beta) = (expected - delta, expected + delta)
+        self.__aspiration_searches += 1
+        while True:
+            choice = self.__rootAlphaBeta(moves, alpha, beta)
+            # Utility values lie within [-1, 1], so a bound past them is open
+            if choice[1] <= alpha:
+                self.__fail_lows += 1
+                alpha = alpha - delta if alpha - delta > -1 else float("-inf")
+            elif choice[1] >= beta:
+                self.__fail_highs += 1
+                beta = beta + delta if beta + delta < 1 else float("inf")
+            else:
+                return choice
+            delta *= 2
+    
+    def __rootMTDf(self, moves, guess):
+        """Searches the root moves with MTD(f), starting from the guessed utility value.
+        
+        Each pass is a zero-window AlphaBeta search of every root move against the window [beta - NULL_WINDOW, beta].
+        A pass that fails high proves the value is at least its result, and a pass that fails low proves it is at most 
+        its result, until both bounds meet. The passes are recorded in :meth:`get_mtdf_passes`.
+        
+        Returns:
+            (object, float): The best move and its utility value.
+        """
+        state = self.__state
+        is_max_turn = state.get_max_turn()
+        self.__passes = []
+        
+        if(len(moves) == 1):
+            undo = state.make_move(moves[0])
+            choice = (moves[0],state.get_utility_value())
+            state.unmake_move(undo)
+            return choice
+        
+        if self.__pv:
+            pv_move = state.decode_move(self.__pv[0])
+            moves = [pv_move] + [move for move in moves if move != pv_move]
+        
+        lower = float("-inf")
+        upper = float("inf")
+        value = guess
+        choice = None
+        while lower < upper:
+            beta = value + SearchEngine.NULL_WINDOW if value == lower else value
+            alpha = beta - SearchEngine.NULL_WINDOW
+            nodes = self.__num_explored
+            (move, value) = self.__rootZeroWindow(moves, alpha, beta, is_max_turn)
+            self.__passes.append((beta, value, self.__num_explored - nodes))
+            if value < beta:
+                upper = value
+                if not is_max_turn:
+                    choice = (move, value)
+            else:
+                lower = value
+                if is_max_turn:
+                    choice = (move, value)
+            # The next pass tries the move that decided this one first
+            moves = [move] + [other for other in moves if other != move]
+        return choice
+    
+    def __rootZeroWindow(self, moves, alpha, beta, is_max_turn):
+        """One MTD(f) pass: searches the root moves against a zero window, stopping at the first move that beats it.
+        
+        Returns:
+            (object, float): The move that decided the pass and the fail-soft utility value of the root.
+        """
+        state = self.__state
+        choice = (None,float("-inf")) if is_max_turn else (None,float("inf"))
+        self.__on_pv = bool(self.__pv) and moves[0].get_key() == self.__pv[0]
+        for move in moves:
+            undo = state.make_move(move)
+            try:
+                val = self.alphaBeta(state,alpha,beta)
+                is_repeat = ai_config.Config.AVOID_TIE and state.check_path()
+            finally:
+                state.unmake_move(undo)
+            self.__on_pv = False
+            if is_max_turn:
+                if is_repeat:
+                    val = val + (-1 - val)/2
+                if val > choice[1]:
+                    choice = (move,val)
+                    if val >= beta:
+                        break
+            else:
+                if is_repeat:
+                    val = val + (1 - val)/2
+                if val < choice[1]:
+                    choice = (move,val)
+                    if val <= alpha:
+                        break
+        return choice
+    
+    def __find_pv(self, state, move, depth):
+        """Follows the best moves stored in the transposition table from the root.
+        
+        Returns:
+            List[int]: The keys of the principal variation's moves.
+        """
+        pv = [move.get_key()]
+        undos = [state.make_move(move)]
+        while len(pv) < depth and not state.is_end_state():
+            entry = self.__table.peek(state.get_hashable_state())
+            if entry is None or not entry[3]:
+                break
+            pv.append(entry[3])
+            undos.append(state.make_move(state.decode_move(entry[3])))
+        for undo in reversed(undos):
+            state.unmake_move(undo)
+        return pv
+    
+    def __check_limits(self):
+        """Aborts the search by raising :class:`SearchTimeout` once the budget has run out."""
+        nodes = self.__num_explored + self.__num_quiescence
+        if self.__node_limit is not None and nodes >= self.__node_limit:
+            raise SearchTimeout("Node budget exhausted")
+        if (nodes & 0xFF) == 0:
+            if self.__deadline is not None and time.time() >= self.__deadline:
+                raise SearchTimeout("Time budget exhausted")
+            if self.__stop is not None and self.__stop.value:
+                raise SearchTimeout("Search stopped")
+            if self.__abort is not None and _ybw_worker["token"].value != self.__abort:
+                raise SearchTimeout("Split aborted")
+        
+    def miniMax(self,state,depth=0): 
+        """Recursively gets the utility value of the given state.
+        
+        Args:
+            state (TwoPlayerGameState): The predecessor state.
+            depth (int): The current depth.
+            
+        Returns:
+            float: The utility value of the state.
+        
+        """
+        
+        self.__num_explored += 1
+        if self.__limited:
+            self.__check_limits()
+        
+        if state.is_end_state():
+            return state.get_utility_value() #Return terminal state's utility value
+        if depth >= (self.__max_depth - 1):
+            return self.quiescence(state, float("-inf"), float("inf"))
+        
+        key = state.get_hashable_state()
+        remaining = self.__max_depth - 1 - depth
+        entry = self.__table.probe(key)
+        if entry is not None and entry[0] >= remaining and entry[2] == TranspositionTable.EXACT:
+            self.__table.record_cut()
+            return entry[1]
+        
+        is_max_turn = state.get_max_turn()
+        best_move = None
+        
+        if is_max_turn:
+            utility = float("-inf")
+            for move in state.get_moves():
+                undo = state.make_move(move)
+                try:
+                    val = self.miniMax(state, depth+1)
+                finally:
+                    state.unmake_move(undo)
+                if val > utility:
+                    (utility, best_move) = (val, move)
+        else:
+            utility = float("inf")
+            for move in state.get_moves():
+                undo = state.make_move(move)
+                try:
+                    val = self.miniMax(state, depth+1)
+                finally:
+                    state.unmake_move(undo)
+                if val < utility:
+                    (utility, best_move) = (val, move)
+        self.__table.store(key, remaining, utility, TranspositionTable.EXACT, 
+                           best_move.get_key() if best_move is not None else 0)
+        return utility
+        
+    def alphaBeta(self,state,alpha,beta,depth=0):
+        """Recursively gets the utility value of the given state, using alpha-beta pruning.
+        
+        The value is fail-soft: a result at or below alpha is an upper bound, and a result 
+        at or above beta is a lower bound. Both are kept in the transposition table as such.
+        
+        In "PVS" mode, only the first move is searched with the full window. The others are searched 
+        with a null window, to prove that they are no better, and searched again if they are.
+        
+        Two selective options of :class:`.Config` apply away from the principal variation, to quiet nodes 
+        (no jump available): with :attr:`.Config.LATE_MOVE_REDUCTION`, the moves late in the ordered list 
+        are searched one move shallower, and searched again at full depth if they beat alpha (beta). 
+        With :attr:`.Config.FUTILITY_PRUNING`, the moves next to the horizon are skipped when the current 
+        utility value, plus :attr:`.Config.FUTILITY_MARGIN`, cannot reach alpha (beta), as a quiet move takes no piece.
+        
+        With a tablebase, a state with few enough pieces is not searched: a win is worth 1, less 
+        :attr:`TABLEBASE_PLY` for each ply to the end of the game, a loss the opposite and a draw 0.
+        
+        Args:
+            state (TwoPlayerGameState): The predecessor state.
+            alpha (float): The current alpha value.
+            beta (float): The current beta value.
+            depth (int): The current depth.
+        Returns:
+            float: The utility value of the state.
+        
+        """
+        
+        self.__num_explored += 1
+        if self.__limited:
+            self.__check_limits()
+        
+        if state.is_end_state():
+            #Return terminal state's utility value
+            return state.get_utility_value()
+        if self.__tablebase is not None and state.get_num_pieces() <= self.__tablebase.get_max_pieces():
+            self.__tablebase_probes += 1
+            entry = self.__tablebase.probe(state)
+            if entry is not None:
+                self.__tablebase_hits += 1
+                # The result is for the side to move
+                (result, plies) = entry
+                value = result*(1 - plies*SearchEngine.TABLEBASE_PLY)
+                return value if state.get_max_turn() else -value
+        if depth >= (self.__max_depth-1):
+            return self.quiescence(state, alpha, beta)
+        
+        key = state.get_hashable_state()
+        remaining = self.__max_depth - 1 - depth
+        tt_move = None
+        entry = self.__table.probe(key)
+        if entry is not None:
+            (entry_depth, score, flag, move_key) = entry
+            if move_key:
+                tt_move = state.decode_move(move_key)
+            if entry_depth >= remaining and (flag == TranspositionTable.EXACT or
+                    (flag == TranspositionTable.LOWER and score >= beta) or
+                    (flag == TranspositionTable.UPPER and score <= alpha)):
+                self.__table.record_cut()
+                return score
+        
+        if self.__on_pv:
+            # Still following the previous iteration's principal variation
+            if depth+1 < len(self.__pv):
+                tt_move = state.decode_move(self.__pv[depth+1])
+            else:
+                self.__on_pv = False
+        
+        is_max_turn = state.get_max_turn()
+        (alpha_orig, beta_orig) = (alpha, beta)
+        best_move = None
+        null_window = self.__mode == "PVS"
+        
+        config = ai_config.Config
+        reduce = futile = False
+        if (config.LATE_MOVE_REDUCTION or config.FUTILITY_PRUNING) and not self.__on_pv and not state.has_jump():
+            reduce = config.LATE_MOVE_REDUCTION and remaining >= config.LMR_DEPTH
+            if config.FUTILITY_PRUNING and remaining == 1:
+                static = state.get_utility_value()
+                if is_max_turn:
+                    futile = static + config.FUTILITY_MARGIN <= alpha
+                else:
+                    futile = static - config.FUTILITY_MARGIN >= beta
+        
+        if is_max_turn:
+            utility = float("-inf")
+            ordered = self.__order_moves(state, tt_move, depth)
+            for (index, move) in enumerate(ordered):
+                if futile and best_move is not None:
+                    utility = max(utility, static + config.FUTILITY_MARGIN)
+                    break
+                if self.__pool is not None and best_move is not None and remaining >= config.YBW_DEPTH:
+                    # The eldest brother has been searched, the young brothers are searched in parallel
+                    (val, move) = self.__split(state, [move] + list(ordered), alpha, beta, depth)
+                    if val > utility:
+                        (utility, best_move) = (val, move)
+                    alpha = max(alpha, val)
+                    if beta <= alpha:
+                        self.__record_cutoff(move, depth, remaining)
+                    break
+                undo = state.make_move(move)
+                try:
+                    val = None
+                    if reduce and index >= config.LMR_MOVES and not state.has_jump():
+                        # A late quiet move is searched one move shallower first
+                        val = self.alphaBeta(state,alpha,beta,depth+2)
+                        if val > alpha:
+                            val = None
+                    if val is None:
+                        if null_window and best_move is not None:
+                            val = self.alphaBeta(state,alpha,alpha+SearchEngine.NULL_WINDOW,depth+1)
+                            if alpha < val < beta:
+                                val = self.alphaBeta(state,val,beta,depth+1)
+                        else:
+                            val = self.alphaBeta(state,alpha,beta,depth+1)
+                finally:
+                    state.unmake_move(undo)
+                self.__on_pv = False
+                if val > utility:
+                    (utility, best_move) = (val, move)
+                alpha = max(alpha, val) 
+                if beta <= alpha:
+                    self.__record_cutoff(move, depth, remaining)
+                    break 
+        else:
+            utility = float("inf")
+            ordered = self.__order_moves(state, tt_move, depth)
+            for (index, move) in enumerate(ordered):
+                if futile and best_move is not None:
+                    utility = min(utility, static - config.FUTILITY_MARGIN)
+                    break
+                if self.__pool is not None and best_move is not None and remaining >= config.YBW_DEPTH:
+                    # The eldest brother has been searched, the young brothers are searched in parallel
+                    (val, move) = self.__split(state, [move] + list(ordered), alpha, beta, depth)
+                    if val < utility:
+                        (utility, best_move) = (val, move)
+                    beta = min(beta, val)
+                    if beta <= alpha:
+                        self.__record_cutoff(move, depth, remaining)
+                    break
+                undo = state.make_move(move)
+                try:
+                    val = None
+                    if reduce and index >= config.LMR_MOVES and not state.has_jump():
+                        # A late quiet move is searched one move shallower first
+                        val = self.alphaBeta(state,alpha,beta,depth+2)
+                        if val < beta:
+                            val = None
+                    if val is None:
+                        if null_window and best_move is not None:
+                            val = self.alphaBeta(state,beta-SearchEngine.NULL_WINDOW,beta,depth+1)
+                            if alpha < val < beta:
+                                val = self.alphaBeta(state,alpha,val,depth+1)
+                        else:
+                            val = self.alphaBeta(state,alpha,beta,depth+1)
+                finally:
+                    state.unmake_move(undo)
+                self.__on_pv = False
+                if val < utility:
+                    (utility, best_move) = (val, move)
+                beta = min(beta, val) 
+                if beta <= alpha:
+                    self.__record_cutoff(move, depth, remaining)
+                    break 
+        
+        if utility <= alpha_orig:
+            flag = TranspositionTable.UPPER
+        elif utility >= beta_orig:
+            flag = TranspositionTable.LOWER
+        else:
+            flag = TranspositionTable.EXACT
+        self.__table.store(key, remaining, utility, flag, 
+                           best_move.get_key() if best_move is not None else 0)
+        return utility
+    
+    def quiescence(self,state,alpha,beta,depth=0):
+        """Gets the utility value of a state at the search horizon, once it is quiet.
+        
+        While the player to move has to jump, the jumps are searched with alpha-beta pruning, 
+        so that the horizon never cuts an exchange in half. No other move is searched: jumps are 
+        mandatory, so unlike chess there is no standing pat. The exchange is followed at most 
+        :attr:`.Config.QUIESCENCE_DEPTH` moves deep, and the nodes past the horizon are counted apart, 
+        see :meth:`get_num_quiescence`.
+        
+        Args:
+            state (TwoPlayerGameState): The state at or past the horizon.
+            alpha (float): The current alpha value.
+            beta (float): The current beta value.
+            depth (int): The number of jumps played past the horizon.
+        Returns:
+            float: The utility value of the state.
+        
+        """
+        if depth > 0:
+            self.__num_quiescence += 1
+            if self.__limited:
+                self.__check_limits()
+            if state.is_end_state():
+                return state.get_utility_value()
+        if depth >= ai_config.Config.QUIESCENCE_DEPTH or not state.has_jump():
+            return state.get_utility_value()
+        
+        moves = sorted(state.iter_moves(), key=lambda move: move.get_num_captures(), reverse=True)
+        if state.get_max_turn():
+            utility = float("-inf")
+            for move in moves:
+                undo = state.make_move(move)
+                try:
+                    val = self.quiescence(state,alpha,beta,depth+1)
+                finally:
+                    state.unmake_move(undo)
+                utility = max(utility, val)
+                alpha = max(alpha, val)
+                if beta <= alpha:
+                    break
+        else:
+            utility = float("inf")
+            for move in moves:
+                undo = state.make_move(move)
+                try:
+                    val = self.quiescence(state,alpha,beta,depth+1)
+                finally:
+                    state.unmake_move(undo)
+                utility = min(utility, val)
+                beta = min(beta, val)
+                if beta <= alpha:
+                    break
+        return utility
+    
+    def __order_moves(self, state, tt_move, depth):
+        """Yields the state's moves, best first: the principal variation or transposition table move, 
+        then captures by the number of pieces taken, then the killer moves of the ply,
+        then quiet moves by their history score.
+        
+        The table move is yielded before the other moves are generated, so a cutoff on it costs no move generation.
+        """
+        if tt_move is not None:
+            yield tt_move
+        if not ai_config.Config.MOVE_ORDERING:
+            for move in state.iter_moves():
+                if move != tt_move:
+                    yield move
+            return
+        moves = [move for move in state.iter_moves() if move != tt_move]
+        if len(moves) > 1:
+            if moves[0].get_num_captures():
+                # Jumps are forced, so either every move is a capture or none is
+                moves.sort(key=lambda move: move.get_num_captures(), reverse=True)
+            else:
+                history = self.__history
+                (killer1, killer2) = self.__killers[depth] if depth < len(self.__killers) else (0, 0)
+                def score(move):
+                    move_key = move.get_key()
+                    if move_key == killer1:
+                        return SearchEngine.KILLER_SCORE + 1
+                    if move_key == killer2:
+                        return SearchEngine.KILLER_SCORE
+                    return history.get(move_key, 0)
+                moves.sort(key=score, reverse=True)
+        for move in moves:
+            yield move
+    
+    def __record_cutoff(self, move, depth, remaining):
+        """Remembers a quiet move that caused a beta cutoff as a killer move of its ply, and raises its history score."""
+        if move.get_num_captures():
+            return
+        move_key = move.get_key()
+        killers = self.__killers
+        while len(killers) <= depth:
+            killers.append([0, 0])
+        if killers[depth][0] != move_key:
+            killers[depth][1] = killers[depth][0]
+            killers[depth][0] = move_key
+        self.__history[move_key] = self.__history.get(move_key, 0) + remaining*remaining
+    
+    def __new_search(self):
+        """Resets the per-search counters and heuristics before a search."""
+        self.__num_explored = 0
+        self.__num_quiescence = 0
+        self.__tablebase_probes = 0
+        self.__tablebase_hits = 0
+        self.__table.new_search()
+        self.__pv = []
+        self.__killers = []
+        # Age the history scores, so that the current position's cutoffs count the most
+        self.__history = {move_key: value >> 1 for (move_key, value) in self.__history.items() if value > 1}
+        
+_root_worker = {}
+
+def _init_root_worker(state, mode, max_depth, bound, tablebase):
+    """Sets up a worker process of :meth:`SearchEngine.startParallel` with its own engine and transposition table."""
+    _root_worker["engine"] = SearchEngine(state, mode, max_depth, workers=1, tablebase=tablebase)
+    _root_worker["bound"] = bound
+
+def _search_root_move(index):
+    """Searches a root move in a worker process, see :meth:`SearchEngine.searchRootMove`."""
+    return _root_worker["engine"].searchRootMove(index, _root_worker["bound"])
+
+_ybw_worker = {}
+
+def _init_ybw_worker(mode, token, bound, table, tablebase):
+    """Sets up a worker process of :meth:`SearchEngine.startYBW` with its own engine, on the given table if any."""
+    _ybw_worker["engine"] = SearchEngine(mode=mode, table=table, workers=1, tablebase=tablebase)
+    _ybw_worker["controllers"] = (Controller(is_ai=True), Controller(is_ai=True))
+    _ybw_worker["token"] = token
+    _ybw_worker["bound"] = bound
+
+def _search_split(cls, code, alpha, beta, depth, max_depth, token):
+    """Searches a young brother in a worker process, see :meth:`SearchEngine.searchSplit`."""
+    state = cls.decode(code, *_ybw_worker["controllers"])
+    return _ybw_worker["engine"].searchSplit(state, alpha, beta, depth, max_depth, token, _ybw_worker["bound"])
+
+_smp_worker = {}
+
+def _init_smp_worker(state, mode, max_depth, table, time_limit, node_limit, stop, tablebase):
+    """Sets up a worker process of :meth:`SearchEngine.startLazySMP` with its own engine on the shared table."""
+    _smp_worker["engine"] = SearchEngine(state, mode, max_depth, table, time_limit, node_limit, workers=1, 
+                                         tablebase=tablebase)
+    _smp_worker["stop"] = stop
+
+def _search_helper(helper, expected):
+    """Runs a Lazy SMP worker, see :meth:`SearchEngine.searchHelper`."""
+    return _smp_worker["engine"].searchHelper(helper, _smp_worker["stop"], expected)
+
+class TranspositionTable:
+    """A transposition table. Keeps search results by position so that they can be reused
+    when a position is reached again, in the same search or a later one.
+    
+    The table has a fixed size: entries live in preallocated arrays, grouped in buckets
+    of :attr:`BUCKET_SIZE` entries indexed by the position's hash. Every search started with 
+    :meth:`new_search` begins a new generation, and entries left from earlier generations 
+    are the first to be overwritten.
+    
+    Args:
+        megabytes (Optional[float]): The memory budget of the table.
+        replacement (Optional[str]): "depth" to only evict an entry of the current search for a result
+            searched at least as deep, or "always" to always store the new result.
+    
+    .. note:: The statistics and the replacement policy are kept here for every kind of table. 
+        Tables that keep their entries elsewhere, like :class:`SharedTranspositionTable`, 
+        override :meth:`_allocate` and the methods that read and write entries.
+    """
+    
+    EXACT = 0 #: int: The stored score is the exact value of the position.
+    LOWER = 1 #: int: The stored score is a lower bound (the search failed high).
+    UPPER = 2 #: int: The stored score is an upper bound (the search failed low).
+    
+    BUCKET_SIZE = 4 #: int: The number of entries sharing a hash index.
+    ENTRY_BYTES = 32 #: int: The memory taken by one entry: key, packed data, score and move, 8 bytes each.
+    MASK = 0xFFFFFFFFFFFFFFFF #: int: Keys and moves are stored as unsigned 64-bit integers.
+    MULTIPLIER = 0x9E3779B97F4A7C15 #: int: The odd 64-bit constant that keys are multiplied by in :meth:`hash_key`.
+    
+    def __init__(self, megabytes=8, replacement="depth"):
+        entries = int(megabytes * 2**20) // TranspositionTable.ENTRY_BYTES
+        self.__num_buckets = max(entries // TranspositionTable.BUCKET_SIZE, 1)
+        self.__size = self.__num_buckets * TranspositionTable.BUCKET_SIZE
+        self.__always_replace = (replacement == "always")
+        self.__generation = 0
+        self._allocate()
+        self.reset_stats()
+        
+    def _allocate(self):
+        """Allocates the entries of the table, see :meth:`get_size`."""
+        self.__keys = array.array('Q', [0]) * self.__size
+        # bit 0: used, bits 1-2: flag, bits 3-10: depth, bits 11-18: generation
+        self.__data = array.array('Q', [0]) * self.__size
+        self.__scores = array.array('d', [0.0]) * self.__size
+        self.__moves = array.array('Q', [0]) * self.__size
+        
+    @staticmethod
+    def hash_key(key):
+        """
+        Mixes a position's hashable state into the 64-bit key that picks its bucket and is stored to check it.
+        Integers are folded 64 bits at a time, each step multiplied by :attr:`MULTIPLIER`: ``hash()`` reduces 
+        them modulo 2**61-1, so positions packed in wider integers, like :meth:`.BitBoard.get_key`, 
+        would collide in regular patterns. Other hashable states are mixed from their ``hash()``.
+        
+        Args:
+            key (hashable): The position's hashable state.
+            
+        Returns:
+            int: The 64-bit key.
+        """
+        if not isinstance(key, int) or key < 0:
+            key = hash(key) & TranspositionTable.MASK
+        mixed = 0
+        while True:
+            mixed = ((mixed ^ (key & TranspositionTable.MASK)) * TranspositionTable.MULTIPLIER) & TranspositionTable.MASK
+            mixed ^= mixed >> 32
+            key >>= 64
+            if not key:
+                return mixed
+        
+    def get_size(self):
+        """
+        Gets the number of entries the table can hold.
+        
+        Returns:
+            int: The capacity of the table.
+        """
+        return self.__size
+        
+    def new_search(self):
+        """
+        Starts a new generation, making the entries of earlier searches the first to be replaced,
+        and resets the probe statistics.
+        """
+        self.__generation = (self.__generation + 1) & 0xFF
+        self.reset_stats()
+        
+    def _get_bucket(self, key):
+        """Gets the index of the first entry of a key's bucket."""
+        return (key % self.__num_buckets) * TranspositionTable.BUCKET_SIZE
+        
+    def _pack(self, depth, flag):
+        """Packs an entry's flag and depth, with the current generation, in the entry's data word."""
+        return 1 | (flag << 1) | (min(max(depth, 0), 0xFF) << 3) | (self.__generation << 11)
+        
+    def _count_probe(self, data, full):
+        """
+        Counts a probe in the statistics.
         
-        Returns:
-            TwoPlayerGameState: The next state to be played.
+        Args:
+            data (int): The data of the entry found, see :meth:`_pack`, or None for a miss.
+            full (bool): Whether the bucket missed in has no empty entry.
         """
-        if self.__mode == "AlphaBeta":
-            next_state = self.startAlphaBeta()
-        else:
-            next_state = self.startMiniMax()
-        self.__state = next_state
-        return next_state
-    
-    def set_state(self,state):
+        self.__probes += 1
+        if data is None:
+            if full:
+                self.__collisions += 1
+            return
+        self.__hits += 1
+        self.__reused_probe = (data >> 11) != self.__generation
+        if self.__reused_probe:
+            self.__reused += 1
+        
+    def _choose_entry(self, bucket, match, depth):
         """
-        Sets the state of the search engine.
+        Picks the entry of a bucket that a result is stored in: the position's own entry, 
+        or else an empty entry, an entry of an earlier generation or the shallowest entry.
         
         Args:
-            state (TwoPlayerGameState): The state to be set.
+            bucket (List[int]): The data of the bucket's entries, see :meth:`_pack`. 0 for an empty entry.
+            match (int): The index in the bucket of the position's own entry, None if it is not stored.
+            depth (int): The depth that the position was searched to.
+            
+        Returns:
+            int: The index in the bucket of the entry, or None if the result is not worth storing.
         """
-        self.__state = state
-    
-    def get_num_explored(self):
+        generation = self.__generation
+        if match is not None:
+            data = bucket[match]
+            if (data >> 11) == generation and ((data >> 3) & 0xFF) > depth and not self.__always_replace:
+                return None
+            return match
+        victim = None
+        victim_rank = None
+        for (index, data) in enumerate(bucket):
+            if not data:
+                rank = (0, 0)
+            elif (data >> 11) != generation:
+                rank = (1, (data >> 3) & 0xFF)
+            else:
+                rank = (2, (data >> 3) & 0xFF)
+            if victim_rank is None or rank < victim_rank:
+                (victim, victim_rank) = (index, rank)
+        if victim_rank[0] == 2 and victim_rank[1] > depth and not self.__always_replace:
+            return None
+        return victim
+        
+    def probe(self, key):
         """
-        Gets the number of explored nodes from the last run.
+        Looks up a position.
         
+        Args:
+            key (hashable): The position's hashable state.
+            
         Returns:
-            int: The number of explored nodes
+            (int, float, int, int): The stored (depth, score, flag, move key), or None if the position is not stored.
+            The move key is 0 when no best move was stored.
         """
-        return self.__num_explored
+        key = TranspositionTable.hash_key(key)
+        start = (key % self.__num_buckets) * TranspositionTable.BUCKET_SIZE
+        keys = self.__keys
+        data = self.__data
+        full = True
+        for index in range(start, start + TranspositionTable.BUCKET_SIZE):
+            entry_data = data[index]
+            if not entry_data:
+                full = False
+            elif keys[index] == key:
+                self._count_probe(entry_data, full)
+                return ((entry_data >> 3) & 0xFF, self.__scores[index],
+                        (entry_data >> 1) & 3, self.__moves[index])
+        self._count_probe(None, full)
+        return None
     
-    def get_time_elapsed(self):
+    def peek(self, key):
         """
-        Gets the time elapsed for the last run.
+        Looks up a position like :meth:`probe`, without counting it in the table's statistics.
         
+        Args:
+            key (hashable): The position's hashable state.
+            
         Returns:
-            float: The time elapsed, in seconds
+            (int, float, int, int): The stored (depth, score, flag, move key), or None if the position is not stored.
         """
-        return self.__time_elapsed
+        key = TranspositionTable.hash_key(key)
+        start = (key % self.__num_buckets) * TranspositionTable.BUCKET_SIZE
+        for index in range(start, start + TranspositionTable.BUCKET_SIZE):
+            entry_data = self.__data[index]
+            if entry_data and self.__keys[index] == key:
+                return ((entry_data >> 3) & 0xFF, self.__scores[index],
+                        (entry_data >> 1) & 3, self.__moves[index])
+        return None
     
-    def startMiniMax(self):
+    def store(self, key, depth, score, flag, move=0):
         """
-        Entry point for the MiniMax algorithm.
-        Gives the most preferable next state.
+        Stores the result of a search. 
+        The position's own entry is updated if it is already stored; otherwise an empty entry,
+        an entry of an earlier generation or the shallowest entry of the bucket is replaced.
         
-        Returns:
-            TwoPlayerGameState: The next state to be played.
+        Args:
+            key (hashable): The position's hashable state.
+            depth (int): The depth that the position was searched to.
+            score (float): The score found.
+            flag (int): :attr:`EXACT`, :attr:`LOWER` or :attr:`UPPER`.
+            move (Optional[int]): The key of the best move found, 0 if there is none.
         """
-        start = time.time()
-        
-        is_max_turn = self.__state.get_max_turn()
-        childList = self.__state.get_successors()
-        
-        if is_max_turn:
-            choice = (None,float("-inf"))
-        else:
-            choice = (None,float("inf"))
-        
-        if(len(childList) == 1):
-            choice = (childList[0],childList[0].get_utility_value())
-        else:
-            for c in childList:
-                val = self.miniMax(c)
-                if ai_config.Config.AVOID_TIE and c.check_path():
-                        val = val + (-1 - val)/2
-                if is_max_turn:
-                    if val > choice[1]:
-                        choice = (c,val)
-                else:
-                    if val < choice[1]:
-                        choice = (c,val)
-                
-        self.__num_explored = len(self.__explored.keys())
-        self.__explored.clear()
-                
-        end = time.time()
-        
-        self.__time_elapsed = end-start
+        key = TranspositionTable.hash_key(key)
+        start = (key % self.__num_buckets) * TranspositionTable.BUCKET_SIZE
+        bucket = self.__data[start:start + TranspositionTable.BUCKET_SIZE]
+        keys = self.__keys[start:start + TranspositionTable.BUCKET_SIZE]
+        match = None
+        for index in range(TranspositionTable.BUCKET_SIZE):
+            if bucket[index] and keys[index] == key:
+                match = index
+                break
+        index = self._choose_entry(bucket, match, depth)
+        if index is None:
+            return
+        victim = start + index
+        self.__keys[victim] = key
+        self.__data[victim] = self._pack(depth, flag)
+        self.__scores[victim] = score
+        self.__moves[victim] = move if 0 <= move <= TranspositionTable.MASK else 0
+            
+    def record_cut(self):
+        """
+        Counts a probe whose stored result was used without searching.
+        """
+        self.__cuts += 1
+        if self.__reused_probe:
+            self.__reused_cuts += 1
         
-        print("Utility: "+"{0:.3f}".format(choice[1]))
-        print("Nodes Explored: "+str(self.__num_explored))
-        print("Time Elapsed: "+"{0:.3f} seconds".format(self.__time_elapsed))
+    def clear(self):
+        """
+        Removes every entry from the table.
+        """
+        self.__data = array.array('Q', [0]) * self.__size
         
-        return choice[0]
+    def reset_stats(self):
+        """
+        Resets the probe statistics.
+        """
+        self.__probes = 0
+        self.__hits = 0
+        self.__cuts = 0
+        self.__collisions = 0
+        self.__reused = 0
+        self.__reused_cuts = 0
+        self.__reused_probe = False
         
-    def startAlphaBeta(self):
+    def get_stats(self):
         """
-        Entry point for the AlphaBeta pruning algorithm.
-        Gives the most preferable next state.
+        Gets the probe statistics since the last :meth:`reset_stats`.
+        A collision is a probe that missed on a full bucket, i.e. a position that may have been evicted.
+        A reused hit or cut is one on an entry stored by an earlier search.
         
         Returns:
-            TwoPlayerGameState: The next state to be played.
+            dict: The number of probes, hits, cuts, collisions, reused hits and reused cuts, 
+            and the hit, cut and collision rates.
         """
-        start = time.time()
+        probes = max(self.__probes, 1)
+        return {"probes": self.__probes, "hits": self.__hits, "cuts": self.__cuts,
+                "collisions": self.__collisions, "reused": self.__reused, "reused_cuts": self.__reused_cuts,
+                "hit_rate": self.__hits/probes,
+                "cut_rate": self.__cuts/probes, "collision_rate": self.__collisions/probes}
         
-        alpha = float("-inf")
-        beta = float("inf")
+    def get_stats_string(self):
+        """
+        Formats the probe statistics for printing.
         
-        is_max_turn = self.__state.get_max_turn()
-        childList = self.__state.get_successors()
+        Returns:
+            str: The hit, cut and collision rates.
+        """
+        stats = self.get_stats()
+        return ("TT Hits: "+"{0:.1%}".format(stats["hit_rate"])+
+                " Cuts: "+"{0:.1%}".format(stats["cut_rate"])+
+                " Collisions: "+"{0:.1%}".format(stats["collision_rate"]))
         
-        choice = (None,float("-inf")) if is_max_turn else (None,float("inf"))
+class SharedTranspositionTable(TranspositionTable):
+    """A transposition table in shared memory, so that searches in several processes share their results, 
+    see :meth:`SearchEngine.startLazySMP`. It is used like a :class:`TranspositionTable`; forked processes 
+    share the table they inherit, and other processes attach to it by name. Processes forked after 
+    :meth:`new_search` keep searching in that generation, and each process keeps its own statistics.
+    
+    Entries are written without locks. Each entry stores its key XORed with its other fields, so an entry 
+    read while another process is writing it does not match its key, and is read as a miss.
+    
+    Args:
+        megabytes (Optional[float]): The memory budget of the table.
+        replacement (Optional[str]): The replacement policy, see :class:`TranspositionTable`.
+        name (Optional[str]): The name of an existing table's shared memory, to attach to it. 
+            A new table is made by default.
+    """
+    
+    WORDS = struct.Struct("<Q") #: struct.Struct: Converts a score's 64 bits to an integer.
+    SCORES = struct.Struct("<d") #: struct.Struct: Converts a score to its 64 bits.
+    
+    def __init__(self, megabytes=8, replacement="depth", name=None):
+        self.__name = name
+        super().__init__(megabytes, replacement)
         
-        if(len(childList) == 1):
-            choice = (childList[0],childList[0].get_utility_value())
+    def _allocate(self):
+        """Allocates the entries of the table in shared memory, or attaches to the named table's memory."""
+        size = self.get_size() * TranspositionTable.ENTRY_BYTES
+        if self.__name is None:
+            self.__memory = multiprocessing.shared_memory.SharedMemory(create=True, size=size)
+            self.__owner = os.getpid()
         else:
-            for c in childList:
-                val = self.alphaBeta(c,alpha,beta)
-                if is_max_turn:
-                    if ai_config.Config.AVOID_TIE and c.check_path():
-                        val = val + (-1 - val)/2
-                    if val > choice[1]:
-                        choice = (c,val)
-                        alpha = val
-                else:
-                    if ai_config.Config.AVOID_TIE and c.check_path():
-                        val = val + (1 - val)/2
-                    if val < choice[1]:
-                        choice = (c,val)
-                        beta = val                
-                
-        self.__num_explored = len(self.__explored.keys())
-        self.__explored.clear()
+            self.__memory = multiprocessing.shared_memory.SharedMemory(self.__name)
+            self.__owner = None
+        # Entry i is words 4i to 4i+3: key check, packed data (as in TranspositionTable), score bits and move
+        self.__words = self.__memory.buf[:size].cast("Q")
         
-        end = time.time()
+    def get_name(self):
+        """
+        Gets the name of the table's shared memory, to attach to it from another process.
         
-        self.__time_elapsed = end-start
+        Returns:
+            str: The name.
+        """
+        return self.__memory.name
+    
+    def __find(self, key):
+        """Finds a key in its bucket.
         
-        print("Utility: "+"{0:.3f}".format(choice[1]))
-        print("Nodes Explored: "+str(self.__num_explored))
-        print("Time Elapsed: "+"{0:.3f} seconds".format(self.__time_elapsed))
+        Returns:
+            (int, int, int, int, bool): The entry's first word, data, score bits and move, or None for the first 
+            four if the key is missing, and whether its bucket has no empty entry.
+        """
+        start = self._get_bucket(key) * 4
+        words = self.__words[start:start + TranspositionTable.BUCKET_SIZE * 4].tolist()
+        full = True
+        for base in range(0, TranspositionTable.BUCKET_SIZE * 4, 4):
+            data = words[base+1]
+            if not data:
+                full = False
+                continue
+            bits = words[base+2]
+            move = words[base+3]
+            if words[base] ^ data ^ bits ^ move == key:
+                return (start + base, data, bits, move, full)
+        return (None, None, None, None, full)
+    
+    def probe(self, key):
+        """
+        Looks up a position, see :meth:`TranspositionTable.probe`.
         
-        return choice[0]
+        Args:
+            key (hashable): The position's hashable state.
             
-        
-    def miniMax(self,state,depth=0): 
-        """Recursively gets the utility value of the given state.
+        Returns:
+            (int, float, int, int): The stored (depth, score, flag, move key), or None if the position is not stored.
+        """
+        (base, data, bits, move, full) = self.__find(TranspositionTable.hash_key(key))
+        self._count_probe(data, full)
+        if base is None:
+            return None
+        return ((data >> 3) & 0xFF, SharedTranspositionTable.SCORES.unpack(SharedTranspositionTable.WORDS.pack(bits))[0],
+                (data >> 1) & 3, move)
+    
+    def peek(self, key):
+        """
+        Looks up a position like :meth:`probe`, without counting it in the table's statistics.
         
         Args:
-            state (TwoPlayerGameState): The predecessor state.
-            depth (int): The current depth.
+            key (hashable): The position's hashable state.
             
         Returns:
-            float: The utility value of the state.
-        
+            (int, float, int, int): The stored (depth, score, flag, move key), or None if the position is not stored.
         """
+        (base, data, bits, move, _) = self.__find(TranspositionTable.hash_key(key))
+        if base is None:
+            return None
+        return ((data >> 3) & 0xFF, SharedTranspositionTable.SCORES.unpack(SharedTranspositionTable.WORDS.pack(bits))[0],
+                (data >> 1) & 3, move)
+    
+    def store(self, key, depth, score, flag, move=0):
+        """
+        Stores the result of a search, replacing entries like :meth:`TranspositionTable.store`.
         
-        #print("NextState (depth "+str(depth)+"):")
-        #print("Action: "+state.get_action())
-        
-        if state in self.__explored:
-            return self.__explored[state.get_hashable_state()]
-        
-        if state.is_end_state() or depth >= (self.__max_depth - 1):
-            self.__explored[state.get_hashable_state()] = state.get_utility_value()
-            return state.get_utility_value() #Return terminal state's utility value
+        Args:
+            key (hashable): The position's hashable state.
+            depth (int): The depth that the position was searched to.
+            score (float): The score found.
+            flag (int): :attr:`EXACT`, :attr:`LOWER` or :attr:`UPPER`.
+            move (Optional[int]): The key of the best move found, 0 if there is none.
+        """
+        key = TranspositionTable.hash_key(key)
+        start = self._get_bucket(key) * 4
+        entries = self.__words[start:start + TranspositionTable.BUCKET_SIZE * 4].tolist()
+        bucket = entries[1::4]
+        match = None
+        for index in range(TranspositionTable.BUCKET_SIZE):
+            base = index*4
+            if bucket[index] and entries[base] ^ entries[base+1] ^ entries[base+2] ^ entries[base+3] == key:
+                match = index
+                break
+        index = self._choose_entry(bucket, match, depth)
+        if index is None:
+            return
+        words = self.__words
+        victim = start + index*4
+        data = self._pack(depth, flag)
+        bits = SharedTranspositionTable.WORDS.unpack(SharedTranspositionTable.SCORES.pack(score))[0]
+        move = move if 0 <= move <= TranspositionTable.MASK else 0
+        words[victim+1] = data
+        words[victim+2] = bits
+        words[victim+3] = move
+        words[victim] = key ^ data ^ bits ^ move
         
-        is_max_turn = state.get_max_turn()
-        childList = state.get_successors()
+    def clear(self):
+        """
+        Removes every entry from the table.
+        """
+        self.__memory.buf[:len(self.__words)*8] = bytes(len(self.__words)*8)
+    
+    def close(self):
+        """
+        Detaches the process from the table. The process that made the table also frees its shared memory.
+        """
+        if getattr(self, "_SharedTranspositionTable__words", None) is None:
+            return
+        self.__words.release()
+        self.__words = None
+        self.__memory.close()
+        if self.__owner == os.getpid():
+            self.__memory.unlink()
+    
+    def __del__(self):
+        self.close()
         
-        if is_max_turn:
-            utility = float("-inf")
-            for c in childList:
-                utility = max(utility,self.miniMax(c, depth+1))
-            self.__explored[state.get_hashable_state()] = utility
-            return utility
-        else:
-            utility = float("inf")
-            for c in childList:
-                utility = min(utility,self.miniMax(c, depth+1))
-            self.__explored[state.get_hashable_state()] = utility
-            return utility
+class GameHistory:
+    """The history of a game: the hashable states played before a state, with how many times each was played.
+    One history is shared by all the states of a game.
+    
+    Each state keeps its own path as a node of a persistent stack, ``(key, parent node, length)``, 
+    which playing a move extends without copying. The history counts the keys of one path at a time, 
+    and moves to a state's path when asked about it, popping and pushing the keys that differ. 
+    The search walks one path up and down, so each lookup only moves the history by a node or two.
+    """
+    
+    def __init__(self):
+        self.__node = None
+        self.__counts = {}
         
-    def alphaBeta(self,state,alpha,beta,depth=0):
-        """Recursively gets the utility value of the given state, using alpha-beta pruning.
+    @staticmethod
+    def push(node, key):
+        """Extends a path.
         
         Args:
-            state (TwoPlayerGameState): The predecessor state.
-            alpha (float): The current alpha value.
-            beta (float): The current beta value.
-            depth (int): The current depth.
+            node (tuple): The path's node, None for an empty path.
+            key (hashable): The hashable state to push.
+            
         Returns:
-            float: The utility value of the state.
-        
+            tuple: The node of the extended path.
         """
+        return (key, node, node[2]+1 if node else 1)
+    
+    @staticmethod
+    def get_keys(node):
+        """Lists the keys of a path.
         
-        #print("NextState (depth "+str(depth)+"):")
-        #print("Action: "+state.get_action())
-        if state in self.__explored:
-            return self.__explored[state.get_hashable_state()]
-        
-        if state.is_end_state() or depth >= (self.__max_depth-1):
-            #Return terminal state's utility value
-            self.__explored[state.get_hashable_state()] = state.get_utility_value()
-            return state.get_utility_value()
-        
-        is_max_turn = state.get_max_turn()
-        childList = state.get_successors()
-        
-        if is_max_turn:
-            for c in childList:
-                #if c in self.__explored.keys():
-                #    continue
-                alpha = max(alpha, self.alphaBeta(c,alpha,beta,depth+1)) 
-                if beta <= alpha:
-                    break 
-            self.__explored[state.get_hashable_state()] = alpha
-            return alpha
-        else:
-            for c in childList:
-                #if c in self.__explored.keys():
-                #    continue
-                beta = min(beta, self.alphaBeta(c,alpha,beta,depth+1)) 
-                if beta <= alpha:
-                    break 
-            self.__explored[state.get_hashable_state()] = beta
-            return beta
+        Args:
+            node (tuple): The path's node.
+            
+        Returns:
+            Tuple[hashable]: The hashable states on the path, from the start of the game.
+        """
+        keys = []
+        while node:
+            keys.append(node[0])
+            node = node[1]
+        return tuple(reversed(keys))
+    
+    def count(self, node, key):
+        """Counts the times a hashable state was played on a path.
         
+        Args:
+            node (tuple): The path's node.
+            key (hashable): The hashable state.
+            
+        Returns:
+            int: The number of times the key is on the path.
+        """
+        if node is not self.__node:
+            self.__move_to(node)
+        return self.__counts.get(key, 0)
+    
+    def __move_to(self, node):
+        """Makes the counts those of the given path, by popping the current path to the common ancestor
+        and pushing the given path's keys from there."""
+        counts = self.__counts
+        current = self.__node
+        depth = current[2] if current else 0
+        target = node
+        target_depth = node[2] if node else 0
+        pushed = []
+        while target_depth > depth:
+            pushed.append(target[0])
+            target = target[1]
+            target_depth -= 1
+        while current is not target:
+            if depth == target_depth:
+                pushed.append(target[0])
+                target = target[1]
+                target_depth -= 1
+            key = current[0]
+            if counts[key] == 1:
+                del counts[key]
+            else:
+                counts[key] -= 1
+            current = current[1]
+            depth -= 1
+        for key in reversed(pushed):
+            counts[key] = counts.get(key, 0) + 1
+        self.__node = node
+
 class TwoPlayerGameState:
     """A state class. Used to define a two-player game state.
     
@@ -252,17 +2015,30 @@ class TwoPlayerGameState:
         parent (Optional[TwoPlayerGameState]): The predecessor state.
         player1 (Optional[Controller]): The player that will start first (MAX).
         player2 (Optional[Controller]): The player that will start second (MIN).
+        sibling (Optional[TwoPlayerGameState]): A state with the same predecessor, whose parent, path 
+            and turn are shared instead. The predecessor itself does not need to be alive.
     
-    .. note:: The state must be provided either a parent state, or player1 and player2.
+    .. note:: The state must be provided either a parent state, a sibling state, or player1 and player2.
+    
+    .. note:: A state only keeps a weak reference to its parent, and its path only keeps the hashable 
+        states of its predecessors, so the states played earlier in the game are freed.
+        The paths of a game share one :class:`GameHistory`.
     """
     
-    def __init__(self,action="START",parent=None,controller1=None,controller2=None):
-        if not (parent or (controller1 and controller2)):
+    def __init__(self,action="START",parent=None,controller1=None,controller2=None,sibling=None):
+        if not (parent or sibling or (controller1 and controller2)):
             raise AIError("Must provide \"parent\" or (\"player1\" and \"player2\")")
         
         self.__action = action
-        self.__parent = parent
-        if parent:
+        self.__parent = weakref.ref(parent) if parent else None
+        if sibling:
+            self.__parent = sibling.__parent
+            self.__max_turn = sibling.__max_turn
+            self.__controller1 = sibling.__controller1
+            self.__controller2 = sibling.__controller2
+            self.__history = sibling.__history
+            self.__path = sibling.__path
+        elif parent:
             self.__max_turn = not parent.get_max_turn()
             # this is not desirable when we are removing pieces,
             # causes inconsistencies between board pieces & player pieces
@@ -270,13 +2046,14 @@ class TwoPlayerGameState:
             # Players get duplicated on each state, and then get connected to the controllers.
             self.__controller1 = parent.__controller1
             self.__controller2 = parent.__controller2
-            self.__path = dict(parent.__path)
-            self.__path[parent.get_hashable_state()] = parent
+            self.__history = parent.__history
+            self.__path = GameHistory.push(parent.__path, parent.get_hashable_state())
         else:
             self.__max_turn = True
             self.__controller1 = controller1
             self.__controller2 = controller2
-            self.__path = dict()
+            self.__history = GameHistory()
+            self.__path = None
         
     def get_controller1(self):
         """Gets the controller who starts first.
@@ -306,9 +2083,9 @@ class TwoPlayerGameState:
         """Gets the state's parent.
     
         Returns:
-            TwoPlayerGameState: The parent state.
+            TwoPlayerGameState: The parent state, or None if it has been freed.
         """
-        return self.__parent
+        return self.__parent() if self.__parent else None
     
     def get_action(self):
         """Get's the state's action.
@@ -326,19 +2103,87 @@ class TwoPlayerGameState:
         """
         self.__action = action
 
+    def push_path(self):
+        """Adds the state to its own path and passes the turn.
+        Used by :meth:`make_move` before the state is changed in place.
+        
+        Returns:
+            tuple: The previous path, to give back to :meth:`pop_path`.
+        """
+        path = self.__path
+        self.__path = GameHistory.push(path, self.get_hashable_state())
+        self.__max_turn = not self.__max_turn
+        return path
+    
+    def pop_path(self, path):
+        """Undoes :meth:`push_path`, once the state has been restored by :meth:`unmake_move`.
+        
+        Args:
+            path (tuple): The value returned by :meth:`push_path`.
+        """
+        self.__path = path
+        self.__max_turn = not self.__max_turn
+
+    def get_path_keys(self):
+        """Gets the hashable states of the path to the state, for :meth:`encode`.
+        
+        Returns:
+            Tuple[hashable]: The hashable states on the path.
+        """
+        return GameHistory.get_keys(self.__path)
+    
+    def restore_path(self, keys, max_turn):
+        """Sets the path and the turn of a state rebuilt by :meth:`decode`. 
+        Only the keys of the path are restored, which is all that :meth:`check_path` needs.
+        
+        Args:
+            keys (Iterable[hashable]): The hashable states given by :meth:`get_path_keys`.
+            max_turn (bool): True for player 1's turn.
+        """
+        path = None
+        for key in keys:
+            path = GameHistory.push(path, key)
+        self.__history = GameHistory()
+        self.__path = path
+        self.__max_turn = max_turn
+    
+    def fork_history(self):
+        """Gives the state a :class:`GameHistory` of its own, with the same path, 
+        so that it can be searched in another thread than the rest of the game.
+        """
+        self.__history = GameHistory()
+    
+    def encode(self):
+        """Encodes the state in a compact, picklable form, to send it to another process.
+        **Must be implemented by child class**
+    
+        Returns:
+            tuple: The encoded state, to give to :meth:`decode`.
+        """
+        raise AIError("Must be implemented in child class!")
+    
+    @classmethod
+    def decode(cls, code, controller1, controller2):
+        """Rebuilds a state encoded by :meth:`encode`.
+        **Must be implemented by child class**
+    
+        Args:
+            code (tuple): The encoded state.
+            controller1 (Controller): The controller for player 1.
+            controller2 (Controller): The controller for player 2.
+            
+        Returns:
+            TwoPlayerGameState: The state.
+        """
+        raise AIError("Must be implemented in child class!")
+    
     def check_path(self):
-        """Performs path checking
+        """Performs path checking, with a lookup in the game's :class:`GameHistory`.
         
         Returns:
             bool: True if duplicate on path exists, false otherwise.
         """
-        return self.get_hashable_state() in self.__path
-#         node = self.get_parent()
-#         while node:
-#             if node.get_hashable_state() == self.get_hashable_state():
-#                 return True
-#             node = node.get_parent()
-#         return False
+        return self.__history.count(self.__path, self.get_hashable_state()) > 0
 
     def get_successors(self):
         """Generates a list of successors for the state.
@@ -350,6 +2195,97 @@ class TwoPlayerGameState:
         
         raise AIError("Must be implemented in child class!")  
     
+    def release_successors(self):
+        """Drops the successors and moves cached by the state, once it has been searched.
+        Child classes that cache them should override it.
+        """
+        pass
+    
+    def get_moves(self):
+        """Generates the moves available from the state, in the same order as :meth:`get_successors`.
+        Printing a move gives its action.
+        **Must be implemented by child class**
+    
+        Returns:
+            List: The moves.
+        """
+        raise AIError("Must be implemented in child class!")  
+    
+    def iter_moves(self):
+        """Yields the moves available from the state one at a time, so that no work is spent
+        on the moves after a cutoff. Child classes may generate them lazily.
+    
+        Returns:
+            Iterator: The moves, in the order of :meth:`get_moves`.
+        """
+        return iter(self.get_moves())
+    
+    def has_jump(self):
+        """Checks whether the player to move is in the middle of a forced exchange, 
+        so that the state is not quiet enough to be evaluated by :meth:`get_utility_value`.
+        Games without forced captures need not implement it.
+    
+        Returns:
+            bool: True if a capture has to be played.
+        """
+        return False
+    
+    def iter_successors(self):
+        """Yields the successors of the state one at a time, building each only when it is reached.
+    
+        Yields:
+            TwoPlayerGameState: The next successor state.
+        """
+        for move in self.iter_moves():
+            yield self.get_successor(move)
+    
+    def make_move(self, move):
+        """Plays the move on the state in place, turning it into its successor.
+        Implementations call :meth:`push_path` to keep the path and turn up to date.
+        **Must be implemented by child class**
+    
+        Args:
+            move: A move given by :meth:`get_moves`.
+            
+        Returns:
+            object: The information needed by :meth:`unmake_move` to restore the state.
+        """
+        raise AIError("Must be implemented in child class!")  
+    
+    def unmake_move(self, undo):
+        """Takes back a move played by :meth:`make_move`.
+        Implementations call :meth:`pop_path` once the state is restored.
+        **Must be implemented by child class**
+    
+        Args:
+            undo (object): The value returned by :meth:`make_move`.
+        """
+        raise AIError("Must be implemented in child class!")  
+    
+    def decode_move(self, key):
+        """Rebuilds a move of the state from the packed integer given by its ``get_key`` method.
+        **Must be implemented by child class**
+    
+        Args:
+            key (int): The packed move.
+            
+        Returns:
+            object: The move.
+        """
+        raise AIError("Must be implemented in child class!")  
+    
+    def get_successor(self, move):
+        """Builds the successor reached by playing the given move, leaving the state unchanged.
+        **Must be implemented by child class**
+    
+        Args:
+            move: A move given by :meth:`get_moves`.
+            
+        Returns:
+            TwoPlayerGameState: The successor state.
+        """
+        raise AIError("Must be implemented in child class!")  
+    
     def get_hashable_state(self):
         """Provides a hashable object that uniquely defines the state.
         **Must be implemented by child class**
@@ -373,6 +2309,15 @@ class TwoPlayerGameState:
             int: The utility value of the state.
         """
         raise AIError("Must be implemented in child class!")  
+    
+    def get_num_pieces(self):
+        """Counts the pieces left in the game, to know when the endgame tablebase applies.
+        **Must be implemented by child class**
+    
+        Returns:
+            int: The number of pieces.
+        """
+        raise AIError("Must be implemented in child class!")  
 
     def is_end_state(self):
         """Determines if the game has ended.
@@ -463,7 +2408,13 @@ class AIError(Exception):
         self.value = value
     def __str__(self):
         return repr(self.value) 
-                   
+    
+class SearchTimeout(AIError):
+    """
+    Raised inside a search when its time or node budget has run out.
+    """
+    pass
+    
 class HumanController(Controller):
     """
     The controller to be used by the user.
@@ -480,39 +2431,51 @@ class HumanController(Controller):
         """
         #Keep asking for the next move until a valid move.
         while(True):
-            childList = state.get_successors()
+            moves = state.get_moves()
             print("Your possible moves:")
             i = 0
-            for c in childList:
+            for move in moves:
                 if i > 0 and i%4 == 0:
                     print()
-                print(c.get_action().ljust(10),end="\t");
+                print(str(move).ljust(10),end="\t");
                 i += 1
             print()
             nextMove = input("What is your next move? \ne.g.'F2-E3' or 'Quit'\n")
             #Check if the move is valid
             if nextMove.lower() == 'Quit'.lower():
                 return None
-            for c in childList:
-                if c.get_action().upper() == nextMove.upper():
-                    return c
+            for move in moves:
+                if str(move).upper() == nextMove.upper():
+                    return state.get_successor(move)
             # Move not possible    
             print("Invalid move!! Please try again...\n")
          
 class AIController(Controller):
     """
     Utilizes AlphaBeta pruning to determine the next state
+    
+    .. note:: With ponder set, the AI searches the opponent's replies during the opponent's turn, 
+        see :meth:`SearchEngine.startPondering`.
+    
+    .. note:: With a tablebase, the AI looks up the endgame positions it holds, see :mod:`endgame_tablebase`.
     """
-    def __init__(self,mode="AlphaBeta",max_depth=5):
+    def __init__(self,mode="AlphaBeta",max_depth=5,time_limit=None,node_limit=None,workers=None,parallel=None,
+                 ponder=False,tablebase=None):
         super().__init__(is_ai = True)
-        self.__engine = SearchEngine(mode = mode, max_depth = max_depth)
+        self.__engine = SearchEngine(mode = mode, max_depth = max_depth, time_limit = time_limit, node_limit = node_limit,
+                                     workers = workers, parallel = parallel, tablebase = tablebase)
+        self.__ponder = ponder
         self.average_time = 0 #: float: The average time taken to calculate the next step.
         self.average_nodes = 0  #: float: The average number of nodes explored.
         self.moves = 0 #: int: The number of moves played by this controller.
+        self.reused_nodes = 0 #: int: The number of nodes that reused earlier searches, see :meth:`SearchEngine.get_reuse_stats`.
+        self.fresh_nodes = 0 #: int: The number of nodes freshly expanded, without reusing an earlier search.
          
     def play_move(self,state):
         """"
-        Gets the next successor using the defined algorithm up to depth d
+        Gets the next successor using the defined algorithm up to depth d.
+        The engine keeps its transposition table from move to move, so the results of the last search 
+        under the moves actually played are reused.
             
         Returns:
             TwoPlayerGameState: The next state to be played.
@@ -528,6 +2491,11 @@ class AIController(Controller):
             self.average_time = ( (self.average_time * self.moves) + time_elapsed ) / (self.moves+1)
             self.average_nodes = ( (self.average_nodes * self.moves) + num_nodes ) / (self.moves+1)
         self.moves += 1
+        (reused, fresh) = self.__engine.get_reuse_stats()
+        self.reused_nodes += reused
+        self.fresh_nodes += fresh
+        if self.__ponder:
+            self.__engine.startPondering(result)
         return result
     
     def get_engine(self):